@@ -1,15 +1,30 @@
 import contextlib
 import os
+from pathlib import Path
 
 from dotenv import load_dotenv
 from flask import Flask
 
-from . import auth, db, links, users
+from . import (
+    auth,
+    avatars,
+    backup,
+    changes,
+    clicks,
+    db,
+    idempotency,
+    links,
+    profiles,
+    profiling,
+    purge,
+    transfer,
+    users,
+)
 
 load_dotenv()
 
 
-def create_app(test_config: dict[str, bool | str] | None = None) -> Flask:
+def create_app(test_config: dict[str, bool | str | int | float] | None = None) -> Flask:
     app = Flask(__name__, instance_relative_config=True)
 
     secret_key = os.getenv("SECRET_KEY")
@@ -19,6 +34,36 @@ def create_app(test_config: dict[str, bool | str] | None = None) -> Flask:
         DATABASE=f"file:{
             os.path.join(app.instance_path, 'link_sharing_app.sqlite')
         }?mode=rwc",
+        CLICK_FLUSH_INTERVAL=5.0,
+        CLICK_FLUSH_THRESHOLD=1000,
+        LINK_TARGET_CACHE_SIZE=10_000,
+        LINK_POSITION_MAX_LENGTH=16,
+        USER_BATCH_MAX_SIZE=100,
+        CHANGES_PAGE_SIZE=500,
+        PURGE_BATCH_SIZE=500,
+        PURGE_BATCH_PAUSE=0.05,
+        PURGE_IN_BACKGROUND=True,
+        ACCESS_TOKEN_TTL=15 * 60,
+        REFRESH_TOKEN_TTL=30 * 24 * 60 * 60,
+        PASSWORD_HASH_METHOD="scrypt:32768:8:1",
+        PASSWORD_HASH_MEMORY_BUDGET=128 * 1024 * 1024,
+        AVATAR_FOLDER=str(Path(app.instance_path) / "avatars"),
+        AVATAR_MAX_BYTES=2 * 1024 * 1024,
+        AVATAR_SIZES=(64, 128, 256),
+        AVATAR_MAX_AGE=365 * 24 * 60 * 60,
+        BACKUP_FOLDER=str(Path(app.instance_path) / "backups"),
+        BACKUP_PAGES_PER_STEP=100,
+        BACKUP_STEP_PAUSE=0.01,
+        BACKUP_INTERVAL=0,
+        BACKUP_KEEP=7,
+        IDEMPOTENCY_MAX_KEYS=10_000,
+        IDEMPOTENCY_TTL=24 * 60 * 60,
+        IDEMPOTENCY_WAIT_TIMEOUT=30.0,
+        PROFILE_SAMPLE_RATE=0.0,
+        PROFILE_TOKEN=os.getenv("PROFILE_TOKEN"),
+        PROFILE_ENDPOINTS=(),
+        PROFILE_MEMORY=True,
+        PROFILE_FOLDER=str(Path(app.instance_path) / "profiles"),
     )
 
     if test_config is None:
@@ -30,10 +75,24 @@ def create_app(test_config: dict[str, bool | str] | None = None) -> Flask:
         os.makedirs(app.instance_path)
 
     db.init_app(app)
+    auth.init_app(app)
+    idempotency.init_app(app)
+    links.init_app(app)
+    clicks.init_app(app)
+    purge.init_app(app)
+    transfer.init_app(app)
+    backup.init_app(app)
+    profiles.init_app(app)
+    profiling.init_app(app)
 
     app.register_blueprint(auth.bp)
     app.register_blueprint(users.bp)
     app.register_blueprint(links.bp)
+    app.register_blueprint(clicks.bp)
+    app.register_blueprint(purge.bp)
+    app.register_blueprint(avatars.bp)
+    app.register_blueprint(profiles.bp)
+    app.register_blueprint(changes.bp)
 
     @app.route("/")
     def health_check() -> tuple[dict[str, str], int]:
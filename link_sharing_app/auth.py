@@ -1,19 +1,148 @@
+import contextlib
 import datetime
+import hashlib
 import os
+import secrets
+import threading
 
 import jwt
 from dotenv import load_dotenv
 from flask import Blueprint, current_app, jsonify, request
-from werkzeug.security import check_password_hash, generate_password_hash
+from werkzeug.security import (
+    DEFAULT_PBKDF2_ITERATIONS,
+    check_password_hash,
+    generate_password_hash,
+)
 
+from . import repository
 from .db import get_db
+from .idempotency import idempotent
+from .profiles import refresh_profile
 
 load_dotenv()
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
 
 
+class MemoryBudget:
+    """Caps the memory used by password hashes running at the same time.
+
+    A hash reserves its estimated memory before running and waits while the
+    reservation would exceed ``limit`` bytes. A hash larger than the whole
+    budget still runs, but alone.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._used = 0
+        self._condition = threading.Condition()
+
+    @contextlib.contextmanager
+    def reserve(self, size):
+        size = min(size, self.limit)
+
+        with self._condition:
+            self._condition.wait_for(lambda: self._used + size <= self.limit)
+            self._used += size
+
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._used -= size
+                self._condition.notify_all()
+
+
+def canonical_hash_method(method):
+    """Expand ``method`` to the fully specified form stored in hashes."""
+    name, *args = method.split(":")
+
+    if name == "scrypt":
+        n, r, p = map(int, args) if args else (2**15, 8, 1)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+
+def hash_memory(method):
+    """Estimate the peak memory in bytes of one hash computed with ``method``."""
+    name, *args = canonical_hash_method(method).split(":")
+
+    if name == "scrypt":
+        n, r, p = map(int, args)
+        return 128 * n * r * p
+
+    return 64 * 1024
+
+
+def hash_password(password):
+    method = current_app.config["PASSWORD_HASH_METHOD"]
+
+    with current_app.extensions["password_hashing"].reserve(hash_memory(method)):
+        return generate_password_hash(password, method=method)
+
+
+def verify_password(stored, password):
+    """Check ``password`` and report whether ``stored`` needs rehashing.
+
+    Returns a ``(valid, outdated)`` pair, where ``outdated`` is only true for
+    a valid password whose hash does not use the current policy.
+    """
+    method = stored.split("$", 1)[0]
+
+    try:
+        memory = hash_memory(method)
+    except ValueError:
+        # Not a hash at all, e.g. a password stored in plain text.
+        return False, False
+
+    with current_app.extensions["password_hashing"].reserve(memory):
+        valid = check_password_hash(stored, password)
+
+    current = canonical_hash_method(current_app.config["PASSWORD_HASH_METHOD"])
+
+    return valid, valid and method != current
+
+
+def get_secret_key():
+    secret_key = current_app.config.get("SECRET_KEY") or os.getenv("SECRET_KEY")
+    if not secret_key:
+        raise ValueError("No secret key set.")
+
+    return secret_key
+
+
+def hash_refresh_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_tokens(db, user_id, secret_key):
+    """Create a short-lived access token and a new refresh token session."""
+    payload_data = {
+        "user_id": user_id,
+        "exp": datetime.datetime.now(datetime.UTC)
+        + datetime.timedelta(seconds=current_app.config["ACCESS_TOKEN_TTL"]),
+    }
+    token = jwt.encode(payload=payload_data, key=secret_key)
+    refresh_token = secrets.token_urlsafe(32)
+
+    repository.create_session(
+        db,
+        user_id,
+        hash_refresh_token(refresh_token),
+        current_app.config["REFRESH_TOKEN_TTL"],
+    )
+    db.commit()
+
+    return {"token": token, "refresh_token": refresh_token}
+
+
 @bp.route("/register", methods=["POST"])
+@idempotent
 def register():
     if not request.is_json:
         return jsonify({"error": "Invalid JSON data."}), 415
@@ -33,10 +162,8 @@ def register():
         return jsonify({"error": "Password is required."}), 400
 
     try:
-        db.execute(
-            "INSERT INTO users (email, password) VALUES (?, ?)",
-            (email, generate_password_hash(password)),
-        )
+        user = repository.create_user(db, email, hash_password(password))
+        refresh_profile(db, user.id)
         db.commit()
         return jsonify({"message": "User registered successfully."}), 201
     except db.IntegrityError:
@@ -55,28 +182,84 @@ def login():
     email = data.get("email")
     password = data.get("password")
     db = get_db()
-
-    secret_key = current_app.config.get("SECRET_KEY") or os.getenv("SECRET_KEY")
-    if not secret_key:
-        raise ValueError("No secret key set.")
+    secret_key = get_secret_key()
 
     if not email:
         return jsonify({"error": "Email is required."}), 400
     if not password:
         return jsonify({"error": "Password is required."}), 400
 
-    user = db.execute("SELECT * FROM users WHERE email = ?", (email,)).fetchone()
+    user = repository.get_user_by_email(db, email)
 
     if user is None:
         return jsonify({"error": "User is not found."}), 404
-    if not check_password_hash(user["password"], password):
+
+    valid, outdated = verify_password(user.password, password)
+
+    if not valid:
         return jsonify({"error": "Incorrect password."}), 401
+    if outdated:
+        repository.rehash_password(db, user.id, hash_password(password))
 
-    payload_data = {
-        "user_id": user["id"],
-        "exp": datetime.datetime.now() + datetime.timedelta(hours=24),
-    }
+    tokens = issue_tokens(db, user.id, secret_key)
+
+    return jsonify({"message": "User logged in successfully.", **tokens}), 200
+
+
+@bp.route("/refresh", methods=["POST"])
+def refresh():
+    if not request.is_json:
+        return jsonify({"error": "Invalid JSON data."}), 415
+    data = request.get_json(silent=True)
+
+    if data is None:
+        return jsonify({"error": "Invalid JSON data."}), 400
+
+    refresh_token = data.get("refresh_token")
+    db = get_db()
+    secret_key = get_secret_key()
+
+    if not isinstance(refresh_token, str) or not refresh_token:
+        return jsonify({"error": "Refresh token is required."}), 400
+
+    token_hash = hash_refresh_token(refresh_token)
+    user_id = repository.consume_session(db, token_hash)
+
+    if user_id is None:
+        # A revoked token being presented again means it was stolen or
+        # replayed, so every session of its owner is revoked.
+        repository.revoke_reused_session(db, token_hash)
+        db.commit()
+        return jsonify({"error": "Invalid refresh token."}), 401
+
+    tokens = issue_tokens(db, user_id, secret_key)
+
+    return jsonify({"message": "Token refreshed successfully.", **tokens}), 200
+
+
+@bp.route("/logout", methods=["POST"])
+def logout():
+    if not request.is_json:
+        return jsonify({"error": "Invalid JSON data."}), 415
+    data = request.get_json(silent=True)
+
+    if data is None:
+        return jsonify({"error": "Invalid JSON data."}), 400
+
+    refresh_token = data.get("refresh_token")
+    db = get_db()
+
+    if not isinstance(refresh_token, str) or not refresh_token:
+        return jsonify({"error": "Refresh token is required."}), 400
+
+    repository.revoke_session(db, hash_refresh_token(refresh_token))
+    db.commit()
+
+    return jsonify({"message": "User logged out successfully."}), 200
 
-    token = jwt.encode(payload=payload_data, key=secret_key)
 
-    return jsonify({"message": "User logged in successfully.", "token": token}), 200
+def init_app(app):
+    canonical_hash_method(app.config["PASSWORD_HASH_METHOD"])
+    app.extensions["password_hashing"] = MemoryBudget(
+        app.config["PASSWORD_HASH_MEMORY_BUDGET"]
+    )
@@ -0,0 +1,219 @@
+import hashlib
+import importlib
+import io
+import os
+import re
+import tempfile
+from pathlib import Path
+from types import ModuleType
+
+from flask import (
+    Blueprint,
+    current_app,
+    jsonify,
+    redirect,
+    request,
+    send_from_directory,
+    url_for,
+)
+from werkzeug.exceptions import NotFound
+
+from . import repository
+from .db import get_db
+from .profiles import refresh_profile
+from .versions import version_headers
+
+# Pillow is optional and has no type stubs, so it is imported as a plain
+# module.
+Image: ModuleType | None
+
+try:
+    Image = importlib.import_module("PIL.Image")
+except ImportError:
+    Image = None
+
+bp = Blueprint("avatars", __name__)
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+AVATAR_FILENAME = re.compile(r"^[0-9a-f]{64}(-\d+)?\.(png|jpg|gif|webp)$")
+
+
+def detect_image_type(data):
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+
+    return None
+
+
+def validate_image(data):
+    """Return the file extension for ``data``, or None if it is not an image.
+
+    Only the signature is checked unless Pillow is installed, in which case
+    the image must also decode.
+    """
+    extension = detect_image_type(data)
+
+    if extension is None or Image is None:
+        return extension
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    return extension
+
+
+def get_avatar_folder(filename):
+    return Path(current_app.config["AVATAR_FOLDER"]) / filename[:2]
+
+
+def write_file(folder, filename, data):
+    """Write ``data`` atomically, skipping files that already exist.
+
+    Files are named by the hash of the original upload, so an existing file
+    already holds the same content.
+    """
+    path = folder / filename
+
+    if path.exists():
+        return
+
+    folder.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder)
+
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+
+    Path(tmp_path).replace(path)
+
+
+def resize_image(data, size):
+    """Return ``data`` scaled down to fit ``size`` pixels, or None.
+
+    Returns None when Pillow is not installed or the image is already small
+    enough, in which case the original is served instead.
+    """
+    if Image is None:
+        return None
+
+    with Image.open(io.BytesIO(data)) as image:
+        if max(image.size) <= size:
+            return None
+
+        image_format = image.format
+        image.thumbnail((size, size))
+        output = io.BytesIO()
+        image.save(output, format=image_format)
+
+    return output.getvalue()
+
+
+def store_avatar(data, extension):
+    digest = hashlib.sha256(data).hexdigest()
+    filename = f"{digest}.{extension}"
+    folder = get_avatar_folder(filename)
+
+    if (folder / filename).exists():
+        return filename
+
+    for size in current_app.config["AVATAR_SIZES"]:
+        variant = resize_image(data, size)
+
+        if variant is not None:
+            write_file(folder, f"{digest}-{size}.{extension}", variant)
+
+    write_file(folder, filename, data)
+
+    return filename
+
+
+def get_variant(filename, size):
+    if size not in current_app.config["AVATAR_SIZES"]:
+        return filename
+
+    digest, extension = filename.split(".")
+    variant = f"{digest}-{size}.{extension}"
+
+    if (get_avatar_folder(filename) / variant).exists():
+        return variant
+
+    return filename
+
+
+@bp.route("/users/<int:id>/avatar", methods=["PUT"])
+def upload_avatar(id):
+    if request.content_length is None:
+        return jsonify({"error": "Image data is required."}), 411
+    if request.content_length > current_app.config["AVATAR_MAX_BYTES"]:
+        return jsonify({"error": "Image is too large."}), 413
+
+    data = request.get_data()
+    extension = validate_image(data)
+
+    if extension is None:
+        return jsonify({"error": "Unsupported image format."}), 415
+
+    db = get_db()
+
+    if repository.get_user(db, id) is None:
+        return jsonify({"error": "User not found."}), 404
+
+    filename = store_avatar(data, extension)
+    user = repository.set_avatar(
+        db, id, filename, url_for("avatars.get_avatar", filename=filename)
+    )
+    refresh_profile(db, id)
+    db.commit()
+
+    if user is None:
+        return jsonify({"error": "User not found."}), 404
+
+    return (
+        jsonify({"data": user.to_dict(), "message": "Avatar uploaded successfully."}),
+        200,
+        version_headers(user),
+    )
+
+
+@bp.route("/users/<int:id>/avatar", methods=["GET"])
+def get_user_avatar(id):
+    user = repository.get_user(get_db(), id)
+
+    if user is None or user.avatar is None:
+        return jsonify({"error": "Avatar not found."}), 404
+
+    filename = get_variant(user.avatar, request.args.get("size", type=int))
+
+    return redirect(url_for("avatars.get_avatar", filename=filename), code=302)
+
+
+@bp.route("/avatars/<filename>", methods=["GET"])
+def get_avatar(filename):
+    if not AVATAR_FILENAME.match(filename):
+        return jsonify({"error": "Avatar not found."}), 404
+
+    try:
+        response = send_from_directory(
+            get_avatar_folder(filename),
+            filename,
+            max_age=current_app.config["AVATAR_MAX_AGE"],
+        )
+    except NotFound:
+        return jsonify({"error": "Avatar not found."}), 404
+
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+
+    return response
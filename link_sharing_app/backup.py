@@ -0,0 +1,203 @@
+import sqlite3
+import threading
+import time
+from datetime import UTC, datetime
+from pathlib import Path
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .db import get_db
+
+BACKUP_PREFIX = "link_sharing_app-"
+
+
+class BackupReport:
+    __slots__ = ("path", "pages", "elapsed", "longest_step", "restarts")
+
+    def __init__(self, path, pages, elapsed, longest_step, restarts):
+        self.path = path
+        self.pages = pages
+        self.elapsed = elapsed
+        self.longest_step = longest_step
+        self.restarts = restarts
+
+    @property
+    def pages_per_second(self):
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+
+class BackupScheduler:
+    """Takes a backup every ``BACKUP_INTERVAL`` seconds on a background thread.
+
+    The thread is started by the first request, so CLI commands never start
+    it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def ensure_started(self):
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="backup-scheduler", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.app.config["BACKUP_INTERVAL"])
+
+            with self.app.app_context():
+                try:
+                    report = backup_database()
+                except sqlite3.Error:
+                    self.app.logger.exception("Failed to back up the database.")
+                else:
+                    self.app.logger.info(
+                        "Backed up %d pages to %s "
+                        "(%.0f pages/s, longest step %.1f ms).",
+                        report.pages,
+                        report.path,
+                        report.pages_per_second,
+                        report.longest_step * 1000,
+                    )
+
+
+def copy_database(source, target, pages, pause):
+    """Copy ``source`` into ``target`` ``pages`` pages at a time.
+
+    Each step holds a read lock on ``source`` only while it copies its pages,
+    and the pause between steps lets writers in. Returns the number of pages,
+    the longest step in seconds and how often SQLite restarted the copy
+    because another connection changed the source.
+    """
+    longest_step = 0.0
+    restarts = 0
+    total = 0
+    last_remaining: int | None = None
+    step_started = time.perf_counter()
+
+    def progress(_status, remaining, page_count):
+        nonlocal longest_step, restarts, total, last_remaining, step_started
+
+        longest_step = max(longest_step, time.perf_counter() - step_started)
+        total = page_count
+
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+
+        last_remaining = remaining
+
+        if remaining:
+            time.sleep(pause)
+
+        step_started = time.perf_counter()
+
+    source.backup(target, pages=pages, progress=progress)
+
+    return total, longest_step, restarts
+
+
+def check_integrity(db):
+    result = [row[0] for row in db.execute("PRAGMA integrity_check")]
+
+    if result != ["ok"]:
+        raise sqlite3.DatabaseError(
+            f"Backup failed the integrity check: {'; '.join(result)}."
+        )
+
+
+def prune_backups(folder, keep, current):
+    """Delete all but the newest ``keep`` backups, never ``current``.
+
+    A ``keep`` of 0 or less keeps every backup.
+    """
+    if keep <= 0:
+        return
+
+    backups = sorted(folder.glob(f"{BACKUP_PREFIX}*.sqlite"), reverse=True)
+
+    for path in backups[keep:]:
+        if path != current:
+            path.unlink()
+
+
+def backup_database(pages=None, pause=None):
+    """Copy the database to a new timestamped file under ``BACKUP_FOLDER``.
+
+    The copy is written to a temporary name and only renamed once it passes
+    ``PRAGMA integrity_check``.
+    """
+    config = current_app.config
+    pages = config["BACKUP_PAGES_PER_STEP"] if pages is None else pages
+    pause = config["BACKUP_STEP_PAUSE"] if pause is None else pause
+    folder = Path(config["BACKUP_FOLDER"])
+    folder.mkdir(parents=True, exist_ok=True)
+
+    stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%S%fZ")
+    path = folder / f"{BACKUP_PREFIX}{stamp}.sqlite"
+    partial = path.with_suffix(".partial")
+    started = time.perf_counter()
+
+    try:
+        target = sqlite3.connect(partial)
+
+        try:
+            total, longest_step, restarts = copy_database(
+                get_db(), target, pages, pause
+            )
+            elapsed = time.perf_counter() - started
+            check_integrity(target)
+        finally:
+            target.close()
+
+        partial.replace(path)
+    finally:
+        partial.unlink(missing_ok=True)
+
+    prune_backups(folder, config["BACKUP_KEEP"], path)
+
+    return BackupReport(path, total, elapsed, longest_step, restarts)
+
+
+@click.command("backup")
+@click.option(
+    "--pages",
+    type=click.IntRange(1),
+    help="Pages copied per step.  [default: BACKUP_PAGES_PER_STEP]",
+)
+@click.option(
+    "--pause",
+    type=click.FloatRange(0),
+    help="Seconds to wait between steps.  [default: BACKUP_STEP_PAUSE]",
+)
+@with_appcontext
+def backup_command(pages, pause):
+    """Back up the database online without blocking writers for long."""
+    try:
+        report = backup_database(pages, pause)
+    except sqlite3.Error as e:
+        raise click.ClickException(str(e)) from e
+
+    click.echo(
+        f"Backed up {report.pages} pages to {report.path} in {report.elapsed:.2f}s "
+        f"({report.pages_per_second:.0f} pages/s, "
+        f"longest step {report.longest_step * 1000:.1f} ms, "
+        f"{report.restarts} restarts)."
+    )
+
+
+def init_app(app):
+    app.cli.add_command(backup_command)
+
+    if app.config["BACKUP_INTERVAL"]:
+        scheduler = app.extensions["backup"] = BackupScheduler(app)
+        app.before_request(scheduler.ensure_started)
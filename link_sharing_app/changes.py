@@ -0,0 +1,69 @@
+from flask import Blueprint, current_app, jsonify, request
+
+from . import repository
+from .db import get_db
+
+bp = Blueprint("changes", __name__, url_prefix="/changes")
+
+
+def parse_page_args(args):
+    """Return ``since``, ``limit`` and ``user_id`` from the query string.
+
+    Raises ValueError for anything that is not a non-negative SQLite integer,
+    or a limit outside ``1..CHANGES_PAGE_SIZE``.
+    """
+    page_size = current_app.config["CHANGES_PAGE_SIZE"]
+    since = int(args.get("since", 0))
+    limit = int(args.get("limit", page_size))
+    user_id = args.get("user_id")
+    user_id = None if user_id is None else int(user_id)
+
+    if not 0 <= since <= repository.MAX_INTEGER or not 0 < limit <= page_size:
+        raise ValueError
+
+    if user_id is not None and not 0 <= user_id <= repository.MAX_INTEGER:
+        raise ValueError
+
+    return since, limit, user_id
+
+
+def get_current_rows(db, changes):
+    """Fetch the live row behind every non-delete change, keyed by entity."""
+    ids: dict[str, set[int]] = {"user": set(), "link": set()}
+
+    for change in changes:
+        if change.op != "delete":
+            ids[change.entity].add(change.entity_id)
+
+    return {
+        "user": repository.get_users(db, list(ids["user"])),
+        "link": repository.get_links(db, list(ids["link"])),
+    }
+
+
+@bp.route("", methods=["GET"])
+def get_changes():
+    try:
+        since, limit, user_id = parse_page_args(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid page parameters."}), 400
+
+    db = get_db()
+    changes = repository.get_changes(db, since, limit + 1, user_id)
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    rows = get_current_rows(db, changes)
+    data = []
+
+    for change in changes:
+        row = rows[change.entity].get(change.entity_id)
+        data.append(change.to_dict() | {"data": row and row.to_dict()})
+
+    return jsonify(
+        {
+            "data": data,
+            "next": changes[-1].seq if changes else since,
+            "has_more": has_more,
+            "message": "Success.",
+        }
+    ), 200
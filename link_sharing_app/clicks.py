@@ -0,0 +1,131 @@
+import atexit
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from flask import Blueprint, current_app, jsonify, redirect
+
+from . import repository
+from .db import get_db
+from .links import get_link, get_link_target
+
+bp = Blueprint("clicks", __name__)
+
+
+class ClickBuffer:
+    """Accumulates link clicks in memory and writes them out in batches.
+
+    Clicks are flushed by a background thread every ``CLICK_FLUSH_INTERVAL``
+    seconds, or inline once ``CLICK_FLUSH_THRESHOLD`` clicks are pending, so a
+    crash loses at most one interval or one threshold worth of clicks.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Counter[int] = Counter()
+        self._flushing: Counter[int] = Counter()
+        self._thread: threading.Thread | None = None
+
+    def record(self, link_id):
+        with self._lock:
+            self._pending[link_id] += 1
+            total = self._pending.total()
+
+        # A failed batch stays pending for the next flush; counting must never
+        # break the redirect.
+        if total >= self.app.config["CLICK_FLUSH_THRESHOLD"]:
+            try:
+                self.flush()
+            except sqlite3.Error:
+                self.app.logger.exception("Failed to flush link clicks.")
+
+        self._ensure_thread()
+
+    def pending(self, link_id):
+        with self._lock:
+            return self._pending[link_id] + self._flushing[link_id]
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, Counter()
+                self._flushing = batch
+
+            if not batch:
+                return 0
+
+            db = get_db()
+            try:
+                repository.add_clicks(db, batch)
+                db.commit()
+            except sqlite3.Error:
+                db.rollback()
+                with self._lock:
+                    self._pending.update(batch)
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = Counter()
+
+            return batch.total()
+
+    def _ensure_thread(self):
+        if self._thread is not None or self.app.config["CLICK_FLUSH_INTERVAL"] <= 0:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="click-flusher", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self._flush_in_app_context)
+
+    def _run(self):
+        while True:
+            time.sleep(self.app.config["CLICK_FLUSH_INTERVAL"])
+            self._flush_in_app_context()
+
+    def _flush_in_app_context(self):
+        with self.app.app_context():
+            try:
+                self.flush()
+            except sqlite3.Error:
+                self.app.logger.exception("Failed to flush link clicks.")
+
+
+def get_click_buffer() -> ClickBuffer:
+    buffer: ClickBuffer = current_app.extensions["clicks"]
+    return buffer
+
+
+@bp.route("/r/<int:link_id>", methods=["GET"])
+def follow_link(link_id):
+    url = get_link_target(link_id)
+
+    if url is None:
+        return jsonify({"error": "Link not found."}), 404
+
+    get_click_buffer().record(link_id)
+
+    return redirect(url, code=302)
+
+
+@bp.route("/links/<int:link_id>/clicks", methods=["GET"])
+def get_link_clicks(link_id):
+    if get_link(link_id) is None:
+        return jsonify({"error": "Link not found."}), 404
+
+    persisted = repository.get_clicks(get_db(), link_id)
+    clicks = persisted + get_click_buffer().pending(link_id)
+
+    return jsonify(
+        {"data": {"link_id": link_id, "clicks": clicks}, "message": "Success."}
+    ), 200
+
+
+def init_app(app):
+    app.extensions["clicks"] = ClickBuffer(app)
@@ -4,6 +4,8 @@ from datetime import datetime
 import click
 from flask import current_app, g
 
+from .repository import STATEMENT_CACHE_SIZE
+
 
 def get_db():
     if "db" not in g:
@@ -11,8 +13,10 @@ def get_db():
             current_app.config["DATABASE"],
             detect_types=sqlite3.PARSE_DECLTYPES,
             uri=True,
+            cached_statements=STATEMENT_CACHE_SIZE,
         )
         g.db.row_factory = sqlite3.Row
+        g.db.execute("PRAGMA foreign_keys = ON")
 
     return g.db
 
@@ -0,0 +1,166 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, jsonify, request
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyEntry:
+    __slots__ = ("fingerprint", "done", "response", "expires")
+
+    def __init__(self, fingerprint):
+        self.fingerprint = fingerprint
+        self.done = threading.Event()
+        self.response = None
+        self.expires = float("inf")
+
+
+class IdempotencyStore:
+    """Remembers the responses of requests sent with an ``Idempotency-Key``.
+
+    At most ``max_keys`` entries are kept, oldest first out, and completed
+    responses expire after ``ttl`` seconds. An entry is created when the first
+    request with a key starts, so duplicates arriving while it runs wait for
+    its response instead of running the view again.
+    """
+
+    def __init__(self, max_keys, ttl):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], IdempotencyEntry] = OrderedDict()
+
+    def begin(self, key, fingerprint):
+        """Return the entry for ``key`` and whether the caller must fill it.
+
+        Returns ``(None, False)`` when ``key`` was used for a different
+        request.
+        """
+        with self._lock:
+            self._evict()
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                if entry.fingerprint != fingerprint:
+                    return None, False
+                return entry, False
+
+            entry = self._entries[key] = IdempotencyEntry(fingerprint)
+
+            while len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+            return entry, True
+
+    def complete(self, key, entry, response):
+        with self._lock:
+            entry.response = response
+            entry.expires = time.monotonic() + self.ttl
+
+            if self._entries.get(key) is entry:
+                self._entries.move_to_end(key)
+
+        entry.done.set()
+
+    def abandon(self, key, entry):
+        """Forget an entry whose request failed, so it can be retried."""
+        with self._lock:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+
+        entry.done.set()
+
+    def _evict(self):
+        now = time.monotonic()
+
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+
+            if entry.expires > now:
+                break
+
+            del self._entries[key]
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    store: IdempotencyStore = current_app.extensions["idempotency"]
+    return store
+
+
+def replay(response):
+    status, headers, body = response
+    replayed = current_app.response_class(body, status, headers)
+    replayed.headers[REPLAYED_HEADER] = "true"
+    return replayed
+
+
+def idempotent(view):
+    """Answer retries of a POST carrying an ``Idempotency-Key`` from the store.
+
+    Keys are scoped to the endpoint and bound to the request body. Server
+    errors are not stored, so a retry after one runs the view again.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+
+        if key is None:
+            return view(*args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": "Invalid Idempotency-Key header."}), 400
+
+        store = get_idempotency_store()
+        scope = (request.endpoint, key)
+        fingerprint = hashlib.sha256(request.get_data()).digest()
+
+        while True:
+            entry, owner = store.begin(scope, fingerprint)
+
+            if entry is None:
+                return jsonify(
+                    {"error": "Idempotency-Key was used for a different request."}
+                ), 422
+
+            if owner:
+                break
+
+            if not entry.done.wait(current_app.config["IDEMPOTENCY_WAIT_TIMEOUT"]):
+                return jsonify(
+                    {"error": "A request with this Idempotency-Key is in progress."}
+                ), 409
+
+            if entry.response is not None:
+                return replay(entry.response)
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except BaseException:
+            store.abandon(scope, entry)
+            raise
+
+        if response.status_code >= 500:
+            store.abandon(scope, entry)
+        else:
+            store.complete(
+                scope,
+                entry,
+                (response.status_code, list(response.headers), response.get_data()),
+            )
+
+        return response
+
+    return wrapper
+
+
+def init_app(app):
+    app.extensions["idempotency"] = IdempotencyStore(
+        app.config["IDEMPOTENCY_MAX_KEYS"], app.config["IDEMPOTENCY_TTL"]
+    )
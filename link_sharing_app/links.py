@@ -1,36 +1,173 @@
-from flask import Blueprint, jsonify, request
+import threading
+from collections import OrderedDict
 
+from flask import Blueprint, current_app, jsonify, request
+
+from . import repository
 from .db import get_db
-from .users import get_user
+from .idempotency import idempotent
+from .positions import key_between, spread_keys
+from .profiles import refresh_profile
+from .versions import get_expected_version, unmatched_write, version_headers
 
 bp = Blueprint("links", __name__, url_prefix="/links")
 
+MOVE_FIELDS = {"after", "before"}
+
 
 def get_link(id):
-    db = get_db()
-    return db.execute(
-        "SELECT * FROM links WHERE id = ?",
-        (id,),
-    ).fetchone()
+    return repository.get_link(get_db(), id)
+
+
+class LinkTargetCache:
+    """Maps link ids to their URLs for redirects, oldest entries out first.
+
+    The cache is shared by every request thread, so all access goes through
+    a lock. A size of 0 disables it.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._urls: OrderedDict[int, str] = OrderedDict()
+
+    def get(self, id):
+        with self._lock:
+            return self._urls.get(id)
+
+    def put(self, id, url):
+        if self.size <= 0:
+            return
+
+        with self._lock:
+            self._urls[id] = url
+
+            while len(self._urls) > self.size:
+                self._urls.popitem(last=False)
+
+    def forget(self, id):
+        with self._lock:
+            self._urls.pop(id, None)
+
+    def clear(self):
+        with self._lock:
+            self._urls.clear()
+
+
+def get_link_targets() -> LinkTargetCache:
+    targets: LinkTargetCache = current_app.extensions["link_targets"]
+    return targets
+
+
+def get_link_target(id):
+    targets = get_link_targets()
+    url = targets.get(id)
+
+    if url is None:
+        link = get_link(id)
+
+        if link is None:
+            return None
+
+        url = link.url
+        targets.put(id, url)
+
+    return url
+
+
+def forget_link_target(id):
+    get_link_targets().forget(id)
+
+
+def forget_link_targets():
+    get_link_targets().clear()
+
+
+def rebalance_links(db, user_id, exclude_id=0):
+    """Give the links of ``user_id`` short, evenly spaced positions again.
+
+    The link being moved is left alone, so its ``If-Match`` version still
+    applies to the move itself.
+    """
+    ids = [id for id in repository.get_user_link_ids(db, user_id) if id != exclude_id]
+    repository.set_link_positions(db, zip(spread_keys(len(ids)), ids, strict=True))
+
+
+def find_position(db, user_id, bounds, exclude_id=0):
+    """Return a position between the two positions ``bounds`` returns.
+
+    Links are rebalanced and ``bounds`` asked again when the neighbours share
+    a position or the new one would exceed ``LINK_POSITION_MAX_LENGTH``.
+    """
+    max_length = current_app.config["LINK_POSITION_MAX_LENGTH"]
+
+    try:
+        position = key_between(*bounds())
+    except ValueError:
+        position = None
+
+    if position is None or len(position) > max_length:
+        rebalance_links(db, user_id, exclude_id)
+        position = key_between(*bounds())
+
+    return position
+
+
+def get_move_bounds(db, link, data):
+    """Return the positions a move described by ``data`` must fall between.
+
+    ``{"after": id}`` and ``{"before": id}`` place the link next to another
+    link of the same user; a null id moves it to the top or bottom.
+    """
+    ((side, anchor_id),) = data.items()
+
+    if anchor_id is None:
+        if side == "after":
+            return None, repository.get_next_position(db, link.user_id, link.id)
+        return repository.get_previous_position(db, link.user_id, link.id), None
+
+    if (
+        not isinstance(anchor_id, int)
+        or isinstance(anchor_id, bool)
+        or not repository.MIN_INTEGER <= anchor_id <= repository.MAX_INTEGER
+    ):
+        raise LookupError
+
+    anchor = get_link(anchor_id)
+
+    if anchor is None or anchor.user_id != link.user_id or anchor.id == link.id:
+        raise LookupError
+
+    if side == "after":
+        return anchor.position, repository.get_next_position(
+            db, link.user_id, link.id, anchor.position, anchor.id
+        )
+
+    return (
+        repository.get_previous_position(
+            db, link.user_id, link.id, anchor.position, anchor.id
+        ),
+        anchor.position,
+    )
 
 
 @bp.route("/<int:user_id>", methods=["GET"])
 def get_all_links(user_id):
-    user = get_user(user_id)
     db = get_db()
+    user = repository.get_user(db, user_id)
 
     if user is None:
         return jsonify({"error": "User not found."}), 404
 
-    links = db.execute(
-        "SELECT * FROM links WHERE user_id = ? ORDER BY created DESC",
-        (user_id,),
-    ).fetchall()
+    links = repository.get_user_links(db, user_id)
 
-    return jsonify({"data": [dict(row) for row in links], "message": "Success."}), 200
+    return jsonify(
+        {"data": [link.to_dict() for link in links], "message": "Success."}
+    ), 200
 
 
 @bp.route("/", methods=["POST"])
+@idempotent
 def create_link():
     if not request.is_json:
         return jsonify({"error": "Invalid JSON data."}), 415
@@ -53,62 +190,135 @@ def create_link():
         return jsonify({"error": "Url is required."}), 400
 
     try:
-        db.execute(
-            "INSERT INTO links (user_id, platform, url) VALUES (?, ?, ?)",
-            (user_id, platform, url),
+        position = find_position(
+            db,
+            user_id,
+            lambda: (None, repository.get_next_position(db, user_id, 0)),
         )
+        link = repository.create_link(db, user_id, platform, url, position)
+        if link is not None:
+            refresh_profile(db, link.user_id)
         db.commit()
-        return jsonify({"message": "Link created successfully."}), 201
     except db.IntegrityError:
         return jsonify({"error": "Failed to create link."}), 409
 
+    if link is None:
+        return jsonify({"error": "User not found."}), 404
+
+    return (
+        jsonify({"data": link.to_dict(), "message": "Link created successfully."}),
+        201,
+        version_headers(link),
+    )
+
 
 @bp.route("/<int:id>", methods=["PATCH"])
 def edit_link_by_id(id):
     db = get_db()
-    link = get_link(id)
+    data = request.get_json(silent=True)
+
+    if not data:
+        return jsonify({"error": "Invalid JSON data."}), 400
+
+    if any(field not in repository.LINK_EDITABLE_FIELDS for field in data):
+        return jsonify({"error": "Invalid field."}), 400
+
+    try:
+        expected = get_expected_version()
+    except ValueError:
+        return jsonify({"error": "Invalid If-Match header."}), 400
+
+    try:
+        link = repository.update_link(db, id, data, expected)
+        if link is not None:
+            refresh_profile(db, link.user_id)
+        db.commit()
+    except db.IntegrityError:
+        return jsonify({"error": "Database integrity error"}), 500
 
     if link is None:
-        return jsonify({"error": "Link not found."}), 404
+        return unmatched_write("Link", expected, lambda: get_link(id) is not None)
+
+    forget_link_target(id)
+
+    return (
+        jsonify({"data": link.to_dict(), "message": "Link edited successfully."}),
+        200,
+        version_headers(link),
+    )
 
+
+@bp.route("/<int:id>/move", methods=["PATCH"])
+def move_link_by_id(id):
+    db = get_db()
     data = request.get_json(silent=True)
 
-    if data is None:
-        return jsonify({"error": "Invalid JSON data."}), 400
+    if not isinstance(data, dict) or len(data) != 1 or not data.keys() <= MOVE_FIELDS:
+        return jsonify({"error": "Send exactly one of after or before."}), 400
 
-    allowed_fields = {"platform", "url"}
+    try:
+        expected = get_expected_version()
+    except ValueError:
+        return jsonify({"error": "Invalid If-Match header."}), 400
 
-    for field in data:
-        if field not in allowed_fields:
-            return jsonify({"error": "Invalid field."}), 400
+    link = get_link(id)
 
-    set_clause = ", ".join([f"{field} = ?" for field in data])
-    values = list(data.values())
+    # A rebalance rewrites the user's other links, so a stale version must be
+    # rejected before anything is written.
+    if link is None or expected not in (None, link.version):
+        return unmatched_write("Link", expected, lambda: link is not None)
 
     try:
-        db.execute(
-            f"UPDATE links SET {set_clause} WHERE id = ?",
-            tuple(values) + (id,),
+        position = find_position(
+            db, link.user_id, lambda: get_move_bounds(db, link, data), link.id
         )
-        db.commit()
+    except LookupError:
+        return jsonify({"error": "Invalid anchor link."}), 400
 
-        return jsonify({"message": "Link edited successfully."}), 200
-    except db.IntegrityError:
-        return jsonify({"error": "Database integrity error"}), 500
+    moved = repository.move_link(db, id, position, expected)
+
+    if moved is None:
+        db.rollback()
+        return unmatched_write("Link", expected, lambda: get_link(id) is not None)
+
+    refresh_profile(db, moved.user_id)
+    db.commit()
+
+    return (
+        jsonify({"data": moved.to_dict(), "message": "Link moved successfully."}),
+        200,
+        version_headers(moved),
+    )
 
 
 @bp.route("/<int:id>", methods=["DELETE"])
 def delete_link_by_id(id):
     db = get_db()
-    link = get_link(id)
 
-    if link is None:
-        return jsonify({"error": "Link not found."}), 404
+    try:
+        expected = get_expected_version()
+    except ValueError:
+        return jsonify({"error": "Invalid If-Match header."}), 400
 
     try:
-        db.execute("DELETE FROM links where id = ?", (id,))
+        link = repository.delete_link(db, id, expected)
+        if link is not None:
+            refresh_profile(db, link.user_id)
         db.commit()
-
-        return jsonify({"message": "Link deleted successfully."}), 200
     except db.IntegrityError:
         return jsonify({"error": "Database integrity error"}), 500
+
+    if link is None:
+        return unmatched_write("Link", expected, lambda: get_link(id) is not None)
+
+    forget_link_target(id)
+
+    return jsonify(
+        {"data": link.to_dict(), "message": "Link deleted successfully."}
+    ), 200
+
+
+def init_app(app):
+    app.extensions["link_targets"] = LinkTargetCache(
+        app.config["LINK_TARGET_CACHE_SIZE"]
+    )
@@ -0,0 +1,87 @@
+"""Lexicographic ranks for ordering links.
+
+A position is a base62 string read as the digits of a fraction between 0 and
+1, without trailing zeros, so comparing positions as strings compares the
+fractions. There is always room for another position between two others,
+which lets a link move by rewriting only its own position.
+"""
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def midpoint(a, b):
+    """Return a position strictly between ``a`` and ``b``.
+
+    ``a`` may be empty (zero) and ``b`` may be None (one).
+    """
+    if b is not None:
+        n = 0
+
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+
+        if n > 0:
+            return b[:n] + midpoint(a[n:], b[n:])
+
+    low = DIGITS.index(a[0]) if a else 0
+    high = DIGITS.index(b[0]) if b is not None else BASE
+
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+
+    if b is not None and len(b) > 1:
+        return b[:1]
+
+    return DIGITS[low] + midpoint(a[1:], None)
+
+
+def key_between(before, after):
+    """Return a position after ``before`` and before ``after``.
+
+    Either bound may be None for the start or end of the list. Positions at
+    either end are stepped by one digit rather than halved, so adding links
+    at the top or bottom grows keys by one character every 60 or so links.
+    """
+    if before is not None and after is not None and before >= after:
+        raise ValueError("Positions are not in order.")
+
+    if before is None and after is None:
+        return DIGITS[BASE // 2]
+
+    if before is None:
+        n = len(after) - len(after.lstrip(DIGITS[0]))
+        first = DIGITS.index(after[n])
+        return after[:n] + DIGITS[first - 1] if first > 1 else midpoint("", after)
+
+    if after is None:
+        n = len(before) - len(before.lstrip(DIGITS[-1]))
+
+        if n == len(before):
+            return midpoint(before, None)
+
+        return before[:n] + DIGITS[DIGITS.index(before[n]) + 1]
+
+    return midpoint(before, after)
+
+
+def spread_keys(count):
+    """Return ``count`` short ascending positions, evenly spaced."""
+    length = 1
+
+    while BASE**length <= count:
+        length += 1
+
+    keys = []
+
+    for i in range(1, count + 1):
+        value = i * BASE**length // (count + 1)
+        digits = []
+
+        for _ in range(length):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+
+        keys.append("".join(reversed(digits)).rstrip("0"))
+
+    return keys
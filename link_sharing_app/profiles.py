@@ -0,0 +1,82 @@
+import click
+from flask import Blueprint, current_app, jsonify
+from flask.cli import with_appcontext
+
+from . import repository
+from .db import get_db
+
+bp = Blueprint("profiles", __name__, url_prefix="/profiles")
+
+
+def build_profile(db, user_id):
+    """Serialize a user and their links into the bytes served for a profile."""
+    user = repository.get_user(db, user_id)
+
+    if user is None:
+        return None
+
+    profile = user.to_dict() | {
+        "links": [link.to_dict() for link in repository.get_user_links(db, user_id)]
+    }
+
+    return current_app.json.dumps({"data": profile, "message": "Success."}).encode()
+
+
+def refresh_profile(db, user_id):
+    """Rewrite the stored profile of ``user_id`` in the current transaction.
+
+    Every mutation of a user or their links calls this before committing, so
+    the stored document never disagrees with the rows it was built from.
+    """
+    body = build_profile(db, user_id)
+
+    if body is None:
+        repository.delete_profile(db, user_id)
+    else:
+        repository.save_profile(db, user_id, body)
+
+    return body
+
+
+def rebuild_profiles(db, batch_size=500):
+    rebuilt = 0
+
+    for user_id in repository.get_live_user_ids(db):
+        refresh_profile(db, user_id)
+        rebuilt += 1
+
+        if rebuilt % batch_size == 0:
+            db.commit()
+
+    db.commit()
+
+    return rebuilt
+
+
+@bp.route("/<int:user_id>", methods=["GET"])
+def get_profile(user_id):
+    db = get_db()
+    body = repository.get_profile(db, user_id)
+
+    if body is None:
+        body = build_profile(db, user_id)
+
+        if body is None:
+            return jsonify({"error": "User not found."}), 404
+
+        repository.save_profile(db, user_id, body)
+        db.commit()
+
+    return current_app.response_class(body, mimetype="application/json")
+
+
+@click.command("rebuild-profiles")
+@with_appcontext
+def rebuild_profiles_command():
+    """Regenerate the stored profile document of every user."""
+    rebuilt = rebuild_profiles(get_db())
+    click.echo(f"Rebuilt {rebuilt} profiles.")
+
+
+def init_app(app):
+    app.cli.add_command(rebuild_profiles_command)
@@ -0,0 +1,146 @@
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+import click
+from flask import current_app, g, request
+from flask.cli import AppGroup
+
+PROFILE_HEADER = "X-Profile"
+MEMORY_TOP_LINES = 25
+
+profiling_cli = AppGroup("profiling", help="Inspect captured request profiles.")
+
+# cProfile and tracemalloc are process wide, so only one request is profiled
+# at a time and requests arriving meanwhile simply run unprofiled.
+_active = threading.Lock()
+
+
+def get_profile_folder():
+    return Path(current_app.config["PROFILE_FOLDER"])
+
+
+def should_profile():
+    config = current_app.config
+    token = config["PROFILE_TOKEN"]
+    header = request.headers.get(PROFILE_HEADER)
+
+    if token and header and hmac.compare_digest(header, token):
+        return True
+
+    if request.endpoint in config["PROFILE_ENDPOINTS"]:
+        return True
+
+    return random.random() < config["PROFILE_SAMPLE_RATE"]
+
+
+def start_profile():
+    if not should_profile() or not _active.acquire(blocking=False):
+        return
+
+    if current_app.config["PROFILE_MEMORY"]:
+        g.profile_started_tracing = not tracemalloc.is_tracing()
+
+        if g.profile_started_tracing:
+            tracemalloc.start()
+
+        g.profile_snapshot = tracemalloc.take_snapshot()
+
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+
+def finish_profile(_exc=None):
+    profiler = g.pop("profiler", None)
+
+    if profiler is None:
+        return
+
+    try:
+        profiler.disable()
+        name = (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{request.endpoint or 'unknown'}-"
+            f"{uuid.uuid4().hex[:8]}"
+        )
+        folder = get_profile_folder()
+        folder.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(folder / f"{name}.prof")
+
+        before = g.pop("profile_snapshot", None)
+
+        if before is not None:
+            after = tracemalloc.take_snapshot()
+
+            if g.pop("profile_started_tracing"):
+                tracemalloc.stop()
+
+            diff = after.compare_to(before, "lineno")[:MEMORY_TOP_LINES]
+            (folder / f"{name}.mem.txt").write_text(
+                "".join(f"{stat}\n" for stat in diff)
+            )
+    finally:
+        _active.release()
+
+
+def iter_profiles(folder):
+    """Yield captured profile files, newest first."""
+    if folder.is_dir():
+        yield from sorted(folder.glob("*.prof"), reverse=True)
+
+
+@profiling_cli.command("list")
+def list_profiles_command():
+    """List captured profiles with their total time."""
+    for path in iter_profiles(get_profile_folder()):
+        stats = pstats.Stats(str(path))
+        click.echo(f"{path.stem}  {stats.get_stats_profile().total_tt * 1000:.1f} ms")
+
+
+@profiling_cli.command("show")
+@click.argument("name")
+@click.option(
+    "--sort",
+    default="cumulative",
+    show_default=True,
+    type=click.Choice(["cumulative", "tottime", "calls"]),
+)
+@click.option("--limit", default=20, show_default=True, type=click.IntRange(1))
+def show_profile_command(name, sort, limit):
+    """Print the hottest functions and allocation sites of a profile."""
+    folder = get_profile_folder()
+    path = folder / f"{name}.prof"
+
+    if not path.is_file():
+        raise click.ClickException(f"Profile not found: {name}.")
+
+    output = io.StringIO()
+    pstats.Stats(str(path), stream=output).sort_stats(sort).print_stats(limit)
+    click.echo(output.getvalue())
+
+    memory = folder / f"{name}.mem.txt"
+
+    if memory.is_file():
+        click.echo("Allocation changes by line:")
+        click.echo(memory.read_text())
+
+
+def init_app(app):
+    app.cli.add_command(profiling_cli)
+
+    config = app.config
+
+    # Without any trigger configured, requests do not pay for the hooks.
+    if (
+        config["PROFILE_SAMPLE_RATE"]
+        or config["PROFILE_TOKEN"]
+        or config["PROFILE_ENDPOINTS"]
+    ):
+        app.before_request(start_profile)
+        app.teardown_request(finish_profile)
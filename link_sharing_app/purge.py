@@ -0,0 +1,137 @@
+import sqlite3
+import threading
+import time
+
+import click
+from flask import Blueprint, current_app, jsonify
+from flask.cli import with_appcontext
+
+from . import repository
+from .db import get_db
+
+bp = Blueprint("purge", __name__)
+
+
+class PurgeWorker:
+    """Purges the links of soft-deleted users on a background thread.
+
+    Each batch of ``PURGE_BATCH_SIZE`` links is deleted in its own short
+    transaction, with ``PURGE_BATCH_PAUSE`` seconds between batches so other
+    writers are never blocked for long.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._resumed = threading.Event()
+
+    def resume(self):
+        """Wake the worker for purges left unfinished by an earlier process.
+
+        Called before every request, but only the first one checks.
+        """
+        if self._resumed.is_set():
+            return
+
+        with self._lock:
+            if self._resumed.is_set():
+                return
+            self._resumed.set()
+
+        try:
+            pending = repository.get_pending_purges(get_db())
+        except sqlite3.Error:
+            self.app.logger.exception("Failed to check for pending purges.")
+            return
+
+        if pending:
+            self.wake()
+
+    def wake(self):
+        if not self.app.config["PURGE_IN_BACKGROUND"]:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="user-purger", daemon=True
+                )
+                self._thread.start()
+
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+
+            with self.app.app_context():
+                try:
+                    run_pending_purges()
+                except sqlite3.Error:
+                    self.app.logger.exception("Failed to purge deleted users.")
+
+
+def get_purge_worker() -> PurgeWorker:
+    worker: PurgeWorker = current_app.extensions["purge"]
+    return worker
+
+
+def purge_user(user_id):
+    db = get_db()
+    batch_size = current_app.config["PURGE_BATCH_SIZE"]
+
+    while True:
+        deleted = repository.purge_links_batch(db, user_id, batch_size)
+        db.commit()
+
+        if deleted < batch_size:
+            break
+
+        time.sleep(current_app.config["PURGE_BATCH_PAUSE"])
+
+    repository.finish_purge(db, user_id)
+    db.commit()
+
+
+def run_pending_purges():
+    user_ids = repository.get_pending_purges(get_db())
+
+    for user_id in user_ids:
+        purge_user(user_id)
+
+    return len(user_ids)
+
+
+@bp.route("/users/<int:user_id>/deletion", methods=["GET"])
+def get_deletion_progress(user_id):
+    db = get_db()
+    job = repository.get_purge(db, user_id)
+
+    if job is None:
+        return jsonify({"error": "Deletion not found."}), 404
+
+    remaining = repository.count_user_links(db, user_id)
+
+    return jsonify(
+        {
+            "data": dict(job) | {"remaining_links": remaining},
+            "message": "Success.",
+        }
+    ), 200
+
+
+@click.command("purge-users")
+@with_appcontext
+def purge_users_command():
+    """Purge the links of soft-deleted users that are still pending."""
+    purged = run_pending_purges()
+    click.echo(f"Purged {purged} deleted users.")
+
+
+def init_app(app):
+    worker = app.extensions["purge"] = PurgeWorker(app)
+    app.before_request(worker.resume)
+    app.cli.add_command(purge_users_command)
@@ -0,0 +1,553 @@
+from itertools import combinations
+
+# Range of SQLite INTEGER values; larger Python ints cannot be bound.
+MIN_INTEGER = -(2**63)
+MAX_INTEGER = 2**63 - 1
+
+USER_EDITABLE_FIELDS = ("email", "password", "first_name", "last_name", "image_url")
+LINK_EDITABLE_FIELDS = ("platform", "url")
+
+
+class User:
+    __slots__ = (
+        "id",
+        "email",
+        "password",
+        "first_name",
+        "last_name",
+        "image_url",
+        "avatar",
+        "version",
+    )
+
+    def __init__(
+        self, id, email, password, first_name, last_name, image_url, avatar, version
+    ):
+        self.id = id
+        self.email = email
+        self.password = password
+        self.first_name = first_name
+        self.last_name = last_name
+        self.image_url = image_url
+        self.avatar = avatar
+        self.version = version
+
+    def to_dict(self):
+        return {
+            "email": self.email,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "image_url": self.image_url,
+        }
+
+
+class Link:
+    __slots__ = ("id", "user_id", "platform", "url", "position", "created", "version")
+
+    def __init__(self, id, user_id, platform, url, position, created, version):
+        self.id = id
+        self.user_id = user_id
+        self.platform = platform
+        self.url = url
+        self.position = position
+        self.created = created
+        self.version = version
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "platform": self.platform,
+            "url": self.url,
+            "position": self.position,
+            "created": self.created,
+            "version": self.version,
+        }
+
+
+class Change:
+    __slots__ = ("seq", "entity", "entity_id", "user_id", "op", "version", "changed")
+
+    def __init__(self, seq, entity, entity_id, user_id, op, version, changed):
+        self.seq = seq
+        self.entity = entity
+        self.entity_id = entity_id
+        self.user_id = user_id
+        self.op = op
+        self.version = version
+        self.changed = changed
+
+    def to_dict(self):
+        return {
+            "seq": self.seq,
+            "entity": self.entity,
+            "id": self.entity_id,
+            "user_id": self.user_id,
+            "op": self.op,
+            "version": self.version,
+            "changed": self.changed,
+        }
+
+
+USER_COLUMNS = ", ".join(User.__slots__)
+LINK_COLUMNS = ", ".join(f"links.{column}" for column in Link.__slots__)
+CHANGE_COLUMNS = ", ".join(Change.__slots__)
+
+# Batch lookups bind exactly this many ids per statement, well below
+# SQLite's limit on host parameters, padding the last chunk with repeats.
+IN_CHUNK_SIZE = 100
+IN_CHUNK = ", ".join("?" * IN_CHUNK_SIZE)
+
+LIVE_LINK = (
+    "EXISTS (SELECT 1 FROM users "
+    "WHERE users.id = links.user_id AND users.deleted_at IS NULL)"
+)
+
+
+def build_update_statements(table, fields, where, returning):
+    """Prepare an UPDATE for every combination of editable fields.
+
+    Each entry maps the set of submitted fields to the canonical field order
+    and the statement text without and with an ``If-Match`` version check, so
+    every write reuses one of a fixed set of statements.
+    """
+    statements = {}
+
+    for size in range(1, len(fields) + 1):
+        for combo in combinations(fields, size):
+            set_clause = ", ".join(f"{field} = ?" for field in combo)
+            update = f"UPDATE {table} SET {set_clause}, version = version + 1 "
+            statements[frozenset(combo)] = (
+                combo,
+                f"{update}WHERE {where} RETURNING {returning}",
+                f"{update}WHERE {where} AND version = ? RETURNING {returning}",
+            )
+
+    return statements
+
+
+UPDATE_USER = build_update_statements(
+    "users", USER_EDITABLE_FIELDS, "id = ? AND deleted_at IS NULL", USER_COLUMNS
+)
+UPDATE_LINK = build_update_statements(
+    "links", LINK_EDITABLE_FIELDS, f"id = ? AND {LIVE_LINK}", LINK_COLUMNS
+)
+
+SELECT_USER = f"SELECT {USER_COLUMNS} FROM users WHERE id = ? AND deleted_at IS NULL"
+SELECT_USERS = (
+    f"SELECT {USER_COLUMNS} FROM users WHERE id IN ({IN_CHUNK}) AND deleted_at IS NULL"
+)
+SELECT_USER_BY_EMAIL = (
+    f"SELECT {USER_COLUMNS} FROM users WHERE email = ? AND deleted_at IS NULL"
+)
+INSERT_USER = (
+    f"INSERT INTO users (email, password) VALUES (?, ?) RETURNING {USER_COLUMNS}"
+)
+SET_AVATAR = (
+    "UPDATE users SET avatar = ?, image_url = ?, version = version + 1 "
+    f"WHERE id = ? AND deleted_at IS NULL RETURNING {USER_COLUMNS}"
+)
+REHASH_PASSWORD = "UPDATE users SET password = ? WHERE id = ?"
+SOFT_DELETE_USER = (
+    "UPDATE users SET deleted_at = CURRENT_TIMESTAMP, version = version + 1 "
+    f"WHERE id = ? AND deleted_at IS NULL RETURNING {USER_COLUMNS}"
+)
+SOFT_DELETE_USER_VERSION = (
+    "UPDATE users SET deleted_at = CURRENT_TIMESTAMP, version = version + 1 "
+    f"WHERE id = ? AND deleted_at IS NULL AND version = ? RETURNING {USER_COLUMNS}"
+)
+
+SELECT_LINK = (
+    f"SELECT {LINK_COLUMNS} FROM links "
+    "JOIN users ON users.id = links.user_id "
+    "WHERE links.id = ? AND users.deleted_at IS NULL"
+)
+SELECT_USER_LINKS = (
+    f"SELECT {LINK_COLUMNS} FROM links WHERE user_id = ? ORDER BY position, id"
+)
+SELECT_USERS_LINKS = (
+    f"SELECT {LINK_COLUMNS} FROM links "
+    f"WHERE user_id IN ({IN_CHUNK}) ORDER BY user_id, position, id"
+)
+INSERT_LINK = (
+    "INSERT INTO links (user_id, platform, url, position) SELECT ?, ?, ?, ? "
+    "WHERE EXISTS (SELECT 1 FROM users WHERE id = ? AND deleted_at IS NULL) "
+    f"RETURNING {LINK_COLUMNS}"
+)
+DELETE_LINK = f"DELETE FROM links WHERE id = ? AND {LIVE_LINK} RETURNING {LINK_COLUMNS}"
+DELETE_LINK_VERSION = (
+    f"DELETE FROM links WHERE id = ? AND {LIVE_LINK} AND version = ? "
+    f"RETURNING {LINK_COLUMNS}"
+)
+
+# Neighbours in list order of a position, skipping the link being moved.
+# Bounds of ("", 0) and ("~", 0) sort before and after every position.
+SELECT_NEXT_POSITION = (
+    "SELECT position FROM links WHERE user_id = ? AND id != ? "
+    "AND (position, id) > (?, ?) ORDER BY position, id LIMIT 1"
+)
+SELECT_PREVIOUS_POSITION = (
+    "SELECT position FROM links WHERE user_id = ? AND id != ? "
+    "AND (position, id) < (?, ?) ORDER BY position DESC, id DESC LIMIT 1"
+)
+SELECT_USER_LINK_IDS = "SELECT id FROM links WHERE user_id = ? ORDER BY position, id"
+SET_LINK_POSITION = "UPDATE links SET position = ?, version = version + 1 WHERE id = ?"
+SELECT_USERS_WITH_TIED_POSITIONS = (
+    "SELECT DISTINCT user_id FROM links GROUP BY user_id, position HAVING COUNT(*) > 1"
+)
+SELECT_USER_LINK_IDS_NEWEST_FIRST = (
+    "SELECT id FROM links WHERE user_id = ? ORDER BY position, created DESC, id DESC"
+)
+ASSIGN_LINK_POSITION = "UPDATE links SET position = ? WHERE id = ?"
+MOVE_LINK = (
+    "UPDATE links SET position = ?, version = version + 1 "
+    f"WHERE id = ? AND {LIVE_LINK} RETURNING {LINK_COLUMNS}"
+)
+MOVE_LINK_VERSION = (
+    "UPDATE links SET position = ?, version = version + 1 "
+    f"WHERE id = ? AND {LIVE_LINK} AND version = ? RETURNING {LINK_COLUMNS}"
+)
+
+SELECT_LINKS = (
+    f"SELECT {LINK_COLUMNS} FROM links "
+    "JOIN users ON users.id = links.user_id "
+    f"WHERE links.id IN ({IN_CHUNK}) AND users.deleted_at IS NULL"
+)
+
+SELECT_CHANGES = (
+    f"SELECT {CHANGE_COLUMNS} FROM changes WHERE seq > ? ORDER BY seq LIMIT ?"
+)
+SELECT_USER_CHANGES = (
+    f"SELECT {CHANGE_COLUMNS} FROM changes "
+    "WHERE user_id = ? AND seq > ? ORDER BY seq LIMIT ?"
+)
+
+SELECT_CLICKS = "SELECT clicks FROM link_clicks WHERE link_id = ?"
+UPSERT_CLICKS = (
+    "INSERT INTO link_clicks (link_id, clicks) "
+    "SELECT id, ? FROM links WHERE id = ? "
+    "ON CONFLICT (link_id) DO UPDATE SET clicks = clicks + excluded.clicks"
+)
+
+INSERT_PURGE = "INSERT INTO user_purges (user_id) VALUES (?)"
+QUEUE_MISSING_PURGES = (
+    "INSERT INTO user_purges (user_id) "
+    "SELECT id FROM users WHERE deleted_at IS NOT NULL "
+    "ON CONFLICT (user_id) DO NOTHING"
+)
+SELECT_PURGE = (
+    "SELECT user_id, requested, purged_links, finished "
+    "FROM user_purges WHERE user_id = ?"
+)
+SELECT_PENDING_PURGES = (
+    "SELECT user_id FROM user_purges WHERE finished IS NULL ORDER BY requested"
+)
+DELETE_LINKS_BATCH = (
+    "DELETE FROM links WHERE id IN (SELECT id FROM links WHERE user_id = ? LIMIT ?)"
+)
+UPDATE_PURGE_PROGRESS = (
+    "UPDATE user_purges SET purged_links = purged_links + ? WHERE user_id = ?"
+)
+DELETE_PURGED_USER = "DELETE FROM users WHERE id = ? AND deleted_at IS NOT NULL"
+FINISH_PURGE = "UPDATE user_purges SET finished = CURRENT_TIMESTAMP WHERE user_id = ?"
+COUNT_USER_LINKS = "SELECT COUNT(*) FROM links WHERE user_id = ?"
+
+SELECT_PROFILE = "SELECT body FROM profile_documents WHERE user_id = ?"
+UPSERT_PROFILE = (
+    "INSERT INTO profile_documents (user_id, body) VALUES (?, ?) "
+    "ON CONFLICT (user_id) DO UPDATE SET body = excluded.body"
+)
+DELETE_PROFILE = "DELETE FROM profile_documents WHERE user_id = ?"
+SELECT_LIVE_USER_IDS = "SELECT id FROM users WHERE deleted_at IS NULL ORDER BY id"
+
+INSERT_SESSION = (
+    "INSERT INTO sessions (user_id, token_hash, expires) "
+    "VALUES (?, ?, datetime('now', ?))"
+)
+CONSUME_SESSION = (
+    "UPDATE sessions SET revoked = CURRENT_TIMESTAMP "
+    "WHERE token_hash = ? AND revoked IS NULL AND expires > CURRENT_TIMESTAMP "
+    "AND EXISTS (SELECT 1 FROM users "
+    "WHERE users.id = sessions.user_id AND users.deleted_at IS NULL) "
+    "RETURNING user_id"
+)
+REVOKE_SESSION = (
+    "UPDATE sessions SET revoked = CURRENT_TIMESTAMP "
+    "WHERE token_hash = ? AND revoked IS NULL"
+)
+REVOKE_REUSED_SESSION = (
+    "UPDATE sessions SET revoked = CURRENT_TIMESTAMP "
+    "WHERE revoked IS NULL AND user_id = "
+    "(SELECT user_id FROM sessions WHERE token_hash = ? AND revoked IS NOT NULL)"
+)
+REVOKE_USER_SESSIONS = (
+    "UPDATE sessions SET revoked = CURRENT_TIMESTAMP "
+    "WHERE user_id = ? AND revoked IS NULL"
+)
+
+# Every statement above plus headroom for ad-hoc queries such as the bulk
+# export/import, so the per-connection sqlite3 statement cache never evicts
+# one of the hot statements.
+STATEMENT_CACHE_SIZE = 2 * (len(UPDATE_USER) * 2 + len(UPDATE_LINK) * 2 + 32)
+
+
+def make_user(_cursor, row):
+    return User(*row)
+
+
+def make_link(_cursor, row):
+    return Link(*row)
+
+
+def make_change(_cursor, row):
+    return Change(*row)
+
+
+def query(db, factory, sql, params=()):
+    cursor = db.cursor()
+    cursor.row_factory = factory
+    return cursor.execute(sql, params)
+
+
+def get_user(db, id):
+    return query(db, make_user, SELECT_USER, (id,)).fetchone()
+
+
+def chunk_ids(ids):
+    """Split ``ids`` into tuples of exactly ``IN_CHUNK_SIZE`` parameters."""
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = tuple(ids[start : start + IN_CHUNK_SIZE])
+        yield chunk + chunk[-1:] * (IN_CHUNK_SIZE - len(chunk))
+
+
+def get_users(db, ids):
+    """Return the live users among ``ids``, keyed by id."""
+    return {
+        user.id: user
+        for chunk in chunk_ids(ids)
+        for user in query(db, make_user, SELECT_USERS, chunk)
+    }
+
+
+def get_users_links(db, user_ids):
+    """Return the links of every user in ``user_ids``, grouped by user id."""
+    links: dict[int, list[Link]] = {user_id: [] for user_id in user_ids}
+
+    for chunk in chunk_ids(user_ids):
+        for link in query(db, make_link, SELECT_USERS_LINKS, chunk):
+            links[link.user_id].append(link)
+
+    return links
+
+
+def get_user_by_email(db, email):
+    return query(db, make_user, SELECT_USER_BY_EMAIL, (email,)).fetchone()
+
+
+def create_user(db, email, password):
+    return query(db, make_user, INSERT_USER, (email, password)).fetchone()
+
+
+def update_user(db, id, fields, expected_version=None):
+    return update(db, make_user, UPDATE_USER, id, fields, expected_version)
+
+
+def set_avatar(db, id, avatar, image_url):
+    return query(db, make_user, SET_AVATAR, (avatar, image_url, id)).fetchone()
+
+
+def rehash_password(db, id, password):
+    db.execute(REHASH_PASSWORD, (password, id))
+
+
+def soft_delete_user(db, id, expected_version=None):
+    if expected_version is None:
+        user = query(db, make_user, SOFT_DELETE_USER, (id,)).fetchone()
+    else:
+        user = query(
+            db, make_user, SOFT_DELETE_USER_VERSION, (id, expected_version)
+        ).fetchone()
+
+    if user is not None:
+        db.execute(INSERT_PURGE, (id,))
+        db.execute(REVOKE_USER_SESSIONS, (id,))
+
+    return user
+
+
+def get_link(db, id):
+    return query(db, make_link, SELECT_LINK, (id,)).fetchone()
+
+
+def get_user_links(db, user_id):
+    return query(db, make_link, SELECT_USER_LINKS, (user_id,)).fetchall()
+
+
+def create_link(db, user_id, platform, url, position):
+    return query(
+        db, make_link, INSERT_LINK, (user_id, platform, url, position, user_id)
+    ).fetchone()
+
+
+def get_next_position(db, user_id, exclude_id, position="", id=0):
+    row = db.execute(
+        SELECT_NEXT_POSITION, (user_id, exclude_id, position, id)
+    ).fetchone()
+    return row[0] if row is not None else None
+
+
+def get_previous_position(db, user_id, exclude_id, position="~", id=0):
+    row = db.execute(
+        SELECT_PREVIOUS_POSITION, (user_id, exclude_id, position, id)
+    ).fetchone()
+    return row[0] if row is not None else None
+
+
+def get_user_link_ids(db, user_id):
+    return [row[0] for row in db.execute(SELECT_USER_LINK_IDS, (user_id,))]
+
+
+def set_link_positions(db, positions):
+    """Write ``(position, link_id)`` pairs, bumping each link's version."""
+    db.executemany(SET_LINK_POSITION, positions)
+
+
+def get_users_with_tied_positions(db):
+    return [row[0] for row in db.execute(SELECT_USERS_WITH_TIED_POSITIONS)]
+
+
+def get_user_link_ids_newest_first(db, user_id):
+    """Return link ids in list order, breaking position ties by age."""
+    return [row[0] for row in db.execute(SELECT_USER_LINK_IDS_NEWEST_FIRST, (user_id,))]
+
+
+def assign_link_positions(db, positions):
+    """Write ``(position, link_id)`` pairs without bumping versions."""
+    db.executemany(ASSIGN_LINK_POSITION, positions)
+
+
+def move_link(db, id, position, expected_version=None):
+    if expected_version is None:
+        return query(db, make_link, MOVE_LINK, (position, id)).fetchone()
+
+    return query(
+        db, make_link, MOVE_LINK_VERSION, (position, id, expected_version)
+    ).fetchone()
+
+
+def update_link(db, id, fields, expected_version=None):
+    return update(db, make_link, UPDATE_LINK, id, fields, expected_version)
+
+
+def delete_link(db, id, expected_version=None):
+    if expected_version is None:
+        return query(db, make_link, DELETE_LINK, (id,)).fetchone()
+
+    return query(db, make_link, DELETE_LINK_VERSION, (id, expected_version)).fetchone()
+
+
+def update(db, factory, statements, id, fields, expected_version):
+    """Run the prepared UPDATE matching ``fields`` and return the new row.
+
+    Raises ``KeyError`` when ``fields`` is empty or contains a field that is
+    not editable.
+    """
+    order, sql, versioned_sql = statements[frozenset(fields)]
+    values = tuple(fields[field] for field in order)
+
+    if expected_version is None:
+        return query(db, factory, sql, (*values, id)).fetchone()
+
+    return query(db, factory, versioned_sql, (*values, id, expected_version)).fetchone()
+
+
+def get_links(db, ids):
+    """Return the live links among ``ids``, keyed by id."""
+    return {
+        link.id: link
+        for chunk in chunk_ids(ids)
+        for link in query(db, make_link, SELECT_LINKS, chunk)
+    }
+
+
+def get_changes(db, since, limit, user_id=None):
+    if user_id is None:
+        return query(db, make_change, SELECT_CHANGES, (since, limit)).fetchall()
+
+    return query(
+        db, make_change, SELECT_USER_CHANGES, (user_id, since, limit)
+    ).fetchall()
+
+
+def get_clicks(db, link_id):
+    row = db.execute(SELECT_CLICKS, (link_id,)).fetchone()
+    return row[0] if row is not None else 0
+
+
+def add_clicks(db, clicks):
+    db.executemany(
+        UPSERT_CLICKS, [(count, link_id) for link_id, count in clicks.items()]
+    )
+
+
+def get_purge(db, user_id):
+    return db.execute(SELECT_PURGE, (user_id,)).fetchone()
+
+
+def queue_missing_purges(db):
+    """Queue a purge for every soft-deleted user that has none."""
+    return db.execute(QUEUE_MISSING_PURGES).rowcount
+
+
+def get_pending_purges(db):
+    return [row[0] for row in db.execute(SELECT_PENDING_PURGES)]
+
+
+def purge_links_batch(db, user_id, batch_size):
+    deleted = db.execute(DELETE_LINKS_BATCH, (user_id, batch_size)).rowcount
+    db.execute(UPDATE_PURGE_PROGRESS, (deleted, user_id))
+    return deleted
+
+
+def finish_purge(db, user_id):
+    db.execute(DELETE_PURGED_USER, (user_id,))
+    db.execute(FINISH_PURGE, (user_id,))
+
+
+def count_user_links(db, user_id):
+    return db.execute(COUNT_USER_LINKS, (user_id,)).fetchone()[0]
+
+
+def get_profile(db, user_id):
+    row = db.execute(SELECT_PROFILE, (user_id,)).fetchone()
+    return row[0] if row is not None else None
+
+
+def save_profile(db, user_id, body):
+    db.execute(UPSERT_PROFILE, (user_id, body))
+
+
+def delete_profile(db, user_id):
+    db.execute(DELETE_PROFILE, (user_id,))
+
+
+def get_live_user_ids(db):
+    return [row[0] for row in db.execute(SELECT_LIVE_USER_IDS)]
+
+
+def create_session(db, user_id, token_hash, ttl):
+    db.execute(INSERT_SESSION, (user_id, token_hash, f"+{ttl} seconds"))
+
+
+def consume_session(db, token_hash):
+    """Revoke a live session and return its user id, or None if it is invalid."""
+    row = db.execute(CONSUME_SESSION, (token_hash,)).fetchone()
+    return row[0] if row is not None else None
+
+
+def revoke_session(db, token_hash):
+    db.execute(REVOKE_SESSION, (token_hash,))
+
+
+def revoke_reused_session(db, token_hash):
+    db.execute(REVOKE_REUSED_SESSION, (token_hash,))
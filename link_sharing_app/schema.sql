@@ -1,5 +1,10 @@
 DROP TABLE IF EXISTS users;
 DROP TABLE IF EXISTS links;
+DROP TABLE IF EXISTS link_clicks;
+DROP TABLE IF EXISTS user_purges;
+DROP TABLE IF EXISTS sessions;
+DROP TABLE IF EXISTS profile_documents;
+DROP TABLE IF EXISTS changes;
 
 CREATE TABLE users (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -7,7 +12,10 @@ CREATE TABLE users (
     password TEXT NOT NULL,
     first_name TEXT,
     last_name TEXT,
-    image_url TEXT
+    image_url TEXT,
+    avatar TEXT,
+    deleted_at TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1
 );
 
 CREATE TABLE links (
@@ -15,6 +23,96 @@ CREATE TABLE links (
     user_id INTEGER NOT NULL,
     platform TEXT NOT NULL CHECK ( platform in ('GitHub', 'Frontend_Mentor', 'Twitter', 'LinkedIn', 'YouTube', 'Facebook', 'Twitch', 'Dev.to', 'Codewars', 'Codepen', 'freeCodeCamp', 'GitLab', 'Hashnode', 'Stack_Overflow') ),
     url TEXT UNIQUE NOT NULL,
+    position TEXT NOT NULL DEFAULT 'V',
     created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-)
+);
+
+CREATE INDEX idx_links_user_position ON links (user_id, position);
+
+CREATE TABLE link_clicks (
+    link_id INTEGER PRIMARY KEY,
+    clicks INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (link_id) REFERENCES links(id) ON DELETE CASCADE
+);
+
+CREATE TABLE user_purges (
+    user_id INTEGER PRIMARY KEY,
+    requested TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    purged_links INTEGER NOT NULL DEFAULT 0,
+    finished TIMESTAMP
+);
+
+CREATE TABLE sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    token_hash TEXT UNIQUE NOT NULL,
+    created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires TIMESTAMP NOT NULL,
+    revoked TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE profile_documents (
+    user_id INTEGER PRIMARY KEY,
+    body BLOB NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE TABLE changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    entity TEXT NOT NULL CHECK ( entity in ('user', 'link') ),
+    entity_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    op TEXT NOT NULL CHECK ( op in ('insert', 'update', 'delete') ),
+    version INTEGER,
+    changed TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_changes_user_id ON changes (user_id, seq);
+
+CREATE TRIGGER users_insert_change AFTER INSERT ON users
+BEGIN
+    INSERT INTO changes (entity, entity_id, user_id, op, version)
+    VALUES ('user', new.id, new.id, 'insert', new.version);
+END;
+
+CREATE TRIGGER users_update_change AFTER UPDATE OF version ON users
+WHEN new.version != old.version
+BEGIN
+    INSERT INTO changes (entity, entity_id, user_id, op, version)
+    VALUES (
+        'user',
+        new.id,
+        new.id,
+        CASE WHEN new.deleted_at IS NULL THEN 'update' ELSE 'delete' END,
+        new.version
+    );
+END;
+
+CREATE TRIGGER users_delete_change AFTER DELETE ON users
+WHEN old.deleted_at IS NULL
+BEGIN
+    INSERT INTO changes (entity, entity_id, user_id, op, version)
+    VALUES ('user', old.id, old.id, 'delete', old.version);
+END;
+
+CREATE TRIGGER links_insert_change AFTER INSERT ON links
+BEGIN
+    INSERT INTO changes (entity, entity_id, user_id, op, version)
+    VALUES ('link', new.id, new.user_id, 'insert', new.version);
+END;
+
+CREATE TRIGGER links_update_change AFTER UPDATE OF version ON links
+WHEN new.version != old.version
+BEGIN
+    INSERT INTO changes (entity, entity_id, user_id, op, version)
+    VALUES ('link', new.id, new.user_id, 'update', new.version);
+END;
+
+CREATE TRIGGER links_delete_change AFTER DELETE ON links
+BEGIN
+    INSERT INTO changes (entity, entity_id, user_id, op, version)
+    VALUES ('link', old.id, old.user_id, 'delete', old.version);
+END
@@ -0,0 +1,202 @@
+import json
+import sqlite3
+import time
+
+import click
+from flask.cli import with_appcontext
+
+from . import repository
+from .db import get_db
+from .positions import spread_keys
+from .profiles import rebuild_profiles
+
+TABLES = ("users", "links")
+
+# Soft-deleted users and their links are left out, as they are about to be
+# purged.
+EXPORT_QUERIES = {
+    "users": "SELECT * FROM users WHERE deleted_at IS NULL ORDER BY id",
+    "links": f"SELECT * FROM links WHERE {repository.LIVE_LINK} ORDER BY id",
+}
+
+
+def iter_rows(db):
+    for table in TABLES:
+        for row in db.execute(EXPORT_QUERIES[table]):
+            yield table, dict(row)
+
+
+def dump_rows(rows):
+    for table, row in rows:
+        yield json.dumps({"table": table, "row": row}, default=str) + "\n"
+
+
+def parse_lines(lines):
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+            yield record["table"], record["row"]
+        except (ValueError, KeyError, TypeError) as e:
+            raise click.ClickException(f"Invalid record on line {number}.") from e
+
+
+def chunk_rows(records, size):
+    """Group consecutive records sharing a table and column set into chunks."""
+    key = None
+    chunk: list[tuple[object, ...]] = []
+
+    for table, row in records:
+        columns = tuple(row)
+        if (table, columns) != key or len(chunk) >= size:
+            if chunk:
+                yield key, chunk
+            key = (table, columns)
+            chunk = []
+        chunk.append(tuple(row.values()))
+
+    if chunk:
+        yield key, chunk
+
+
+def get_columns(db, table):
+    return {row["name"] for row in db.execute(f"PRAGMA table_info({table})")}
+
+
+def drop_secondary_indexes(db, tables):
+    """Drop non-unique explicit indexes and return the SQL to recreate them.
+
+    Unique indexes enforce constraints and automatic indexes cannot be
+    dropped, so only plain lookup indexes are deferred.
+    """
+    indexes = db.execute(
+        f"""
+        SELECT name, sql FROM sqlite_master
+        WHERE type = 'index'
+        AND sql IS NOT NULL
+        AND sql NOT LIKE 'CREATE UNIQUE%'
+        AND tbl_name IN ({", ".join("?" for _ in tables)})
+        """,
+        tables,
+    ).fetchall()
+
+    for index in indexes:
+        db.execute(f"DROP INDEX {index['name']}")
+    db.commit()
+
+    return [index["sql"] for index in indexes]
+
+
+def load_rows(db, records, batch_size, transaction_size):
+    columns_by_table = {table: get_columns(db, table) for table in TABLES}
+    loaded = 0
+    uncommitted = 0
+
+    for (table, columns), chunk in chunk_rows(records, batch_size):
+        if table not in columns_by_table:
+            raise click.ClickException(f"Unknown table: {table}.")
+        if not set(columns) <= columns_by_table[table]:
+            raise click.ClickException(f"Unknown columns for table {table}.")
+
+        db.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            chunk,
+        )
+        loaded += len(chunk)
+        uncommitted += len(chunk)
+
+        if uncommitted >= transaction_size:
+            db.commit()
+            uncommitted = 0
+
+    db.commit()
+
+    return loaded
+
+
+def assign_positions(db):
+    """Spread out the positions of links that share one.
+
+    Links imported from exports made before links had positions all get the
+    column default. They are ordered newest first, as they were listed then.
+    """
+    user_ids = repository.get_users_with_tied_positions(db)
+
+    for user_id in user_ids:
+        ids = repository.get_user_link_ids_newest_first(db, user_id)
+        repository.assign_link_positions(
+            db, zip(spread_keys(len(ids)), ids, strict=True)
+        )
+
+    db.commit()
+
+    return len(user_ids)
+
+
+@click.command("export")
+@click.argument("output", type=click.File("w"), default="-")
+@with_appcontext
+def export_command(output):
+    """Stream users and links as NDJSON."""
+    started = time.perf_counter()
+    exported = 0
+
+    for line in dump_rows(iter_rows(get_db())):
+        output.write(line)
+        exported += 1
+
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Exported {exported} rows in {elapsed:.2f}s "
+        f"({exported / elapsed if elapsed else 0:.0f} rows/s).",
+        err=True,
+    )
+
+
+@click.command("import")
+@click.argument("source", type=click.File("r"), default="-")
+@click.option("--batch-size", default=500, show_default=True, type=click.IntRange(1))
+@click.option(
+    "--transaction-size", default=10_000, show_default=True, type=click.IntRange(1)
+)
+@click.option(
+    "--defer-indexes/--keep-indexes",
+    default=True,
+    show_default=True,
+    help="Drop non-unique indexes during the load and rebuild them afterwards.",
+)
+@with_appcontext
+def import_command(source, batch_size, transaction_size, defer_indexes):
+    """Load users and links from NDJSON produced by the export command."""
+    db = get_db()
+    deferred = drop_secondary_indexes(db, TABLES) if defer_indexes else []
+    started = time.perf_counter()
+
+    try:
+        imported = load_rows(db, parse_lines(source), batch_size, transaction_size)
+    except sqlite3.IntegrityError as e:
+        raise click.ClickException(f"Import failed: {e}.") from e
+    finally:
+        db.rollback()
+        for sql in deferred:
+            db.execute(sql)
+        db.commit()
+
+    # Exports made before deleted users were skipped may still contain them.
+    repository.queue_missing_purges(db)
+    assign_positions(db)
+    rebuild_profiles(db)
+
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"Imported {imported} rows in {elapsed:.2f}s "
+        f"({imported / elapsed if elapsed else 0:.0f} rows/s)."
+    )
+
+
+def init_app(app):
+    app.cli.add_command(export_command)
+    app.cli.add_command(import_command)
@@ -1,16 +1,77 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 
+from . import repository
+from .auth import hash_password
 from .db import get_db
+from .links import forget_link_targets
+from .profiles import refresh_profile
+from .purge import get_purge_worker
+from .versions import get_expected_version, unmatched_write, version_headers
 
 bp = Blueprint("users", __name__, url_prefix="/users")
 
 
 def get_user(id):
+    return repository.get_user(get_db(), id)
+
+
+def parse_ids(value):
+    """Parse a comma separated list of ids, dropping repeats but keeping order.
+
+    Raises ``ValueError`` for anything that is not an SQLite integer.
+    """
+    ids = list(dict.fromkeys(int(id) for id in value.split(",")))
+
+    if not all(repository.MIN_INTEGER <= id <= repository.MAX_INTEGER for id in ids):
+        raise ValueError("Id is out of range.")
+
+    return ids
+
+
+def with_password_hash(id, data, expected):
+    """Return ``data`` with its password hashed, or None if the write cannot
+    match.
+
+    Hashing is expensive, so the row and its version are checked first. The
+    UPDATE still checks the version itself.
+    """
+    user = get_user(id)
+
+    if user is None or expected not in (None, user.version):
+        return None
+
+    return data | {"password": hash_password(data["password"])}
+
+
+@bp.route("", methods=["GET"])
+def get_users():
+    if not request.args.get("ids"):
+        return jsonify({"error": "Ids are required."}), 400
+
+    try:
+        ids = parse_ids(request.args["ids"])
+    except ValueError:
+        return jsonify({"error": "Invalid ids."}), 400
+
+    if len(ids) > current_app.config["USER_BATCH_MAX_SIZE"]:
+        return jsonify({"error": "Too many ids."}), 400
+
+    include = request.args.get("include")
+
+    if include not in (None, "links"):
+        return jsonify({"error": "Invalid include."}), 400
+
     db = get_db()
-    return db.execute(
-        "SELECT email, first_name, last_name, image_url FROM users WHERE id = ?",
-        (id,),
-    ).fetchone()
+    users = repository.get_users(db, ids)
+    data = [{"id": id} | users[id].to_dict() for id in ids if id in users]
+
+    if include == "links":
+        links = repository.get_users_links(db, list(users))
+
+        for user in data:
+            user["links"] = [link.to_dict() for link in links[user["id"]]]
+
+    return jsonify({"data": data, "message": "Success."}), 200
 
 
 @bp.route("/<int:id>", methods=["GET"])
@@ -20,58 +81,80 @@ def get_user_by_id(id):
     if user is None:
         return jsonify({"error": "User not found."}), 404
 
-    return jsonify({"data": dict(user), "message": "Success."}), 200
+    return (
+        jsonify({"data": user.to_dict(), "message": "Success."}),
+        200,
+        version_headers(user),
+    )
 
 
 @bp.route("/<int:id>", methods=["PATCH"])
 def edit_user_by_id(id):
     db = get_db()
-    user = get_user(id)
-
-    if user is None:
-        return jsonify({"error": "User not found."}), 404
-
     data = request.get_json(silent=True)
 
-    if data is None:
+    if not data:
         return jsonify({"error": "Invalid JSON data."}), 400
 
-    allowed_fields = {"email", "password", "first_name", "last_name", "image_url"}
-
-    for field in data:
-        if field not in allowed_fields:
-            return jsonify({"error": "Invalid field."}), 400
+    if any(field not in repository.USER_EDITABLE_FIELDS for field in data):
+        return jsonify({"error": "Invalid field."}), 400
 
-    set_clause = ", ".join([f"{field} = ?" for field in data])
-    values = list(data.values())
+    if "password" in data and (
+        not isinstance(data["password"], str) or not data["password"]
+    ):
+        return jsonify({"error": "Invalid password."}), 400
 
     try:
-        db.execute(
-            f"UPDATE users SET {set_clause} WHERE id = ?",
-            (tuple(values) + (id,)),
-        )
-        db.commit()
+        expected = get_expected_version()
+    except ValueError:
+        return jsonify({"error": "Invalid If-Match header."}), 400
+
+    user = None
+
+    if "password" in data:
+        data = with_password_hash(id, data, expected)
 
-        return jsonify({"message": "User edited successfully."}), 200
+    try:
+        if data is not None:
+            user = repository.update_user(db, id, data, expected)
+            refresh_profile(db, id)
+            db.commit()
     except db.IntegrityError:
         return jsonify({"error": "Database integrity error"}), 500
 
+    if user is None:
+        return unmatched_write("User", expected, lambda: get_user(id) is not None)
+
+    return (
+        jsonify({"data": user.to_dict(), "message": "User edited successfully."}),
+        200,
+        version_headers(user),
+    )
+
 
 @bp.route("/<int:id>", methods=["DELETE"])
 def delete_user_by_id(id):
     db = get_db()
-    user = get_user(id)
 
-    if user is None:
-        return jsonify({"error": "User not found."}), 404
+    try:
+        expected = get_expected_version()
+    except ValueError:
+        return jsonify({"error": "Invalid If-Match header."}), 400
 
     try:
-        db.execute(
-            "DELETE FROM users WHERE id = ?",
-            (id,),
-        )
+        user = repository.soft_delete_user(db, id, expected)
+        refresh_profile(db, id)
         db.commit()
-
-        return jsonify({"message": "User deleted successfully."}), 200
     except db.IntegrityError:
         return jsonify({"error": "Database integrity error"}), 500
+
+    if user is None:
+        return unmatched_write("User", expected, lambda: get_user(id) is not None)
+
+    forget_link_targets()
+    get_purge_worker().wake()
+
+    return (
+        jsonify({"data": user.to_dict(), "message": "User deleted successfully."}),
+        202,
+    )
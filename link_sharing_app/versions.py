@@ -0,0 +1,42 @@
+from flask import jsonify, request
+
+from .repository import MAX_INTEGER, MIN_INTEGER
+
+
+def get_expected_version():
+    """Return the row version required by the ``If-Match`` header, if any.
+
+    Raises ``ValueError`` when the header is not a single strong version tag.
+    """
+    if_match = request.if_match
+
+    if not if_match or if_match.star_tag:
+        return None
+
+    tags = if_match.as_set()
+
+    if len(tags) != 1:
+        raise ValueError("If-Match must contain a single version.")
+
+    version = int(tags.pop())
+
+    if not MIN_INTEGER <= version <= MAX_INTEGER:
+        raise ValueError("If-Match version is out of range.")
+
+    return version
+
+
+def version_headers(row):
+    return {"ETag": f'"{row.version}"'}
+
+
+def unmatched_write(name, expected, exists):
+    """Response for a conditional write that matched no row.
+
+    ``exists`` is only called when an ``If-Match`` version was sent, so the
+    extra lookup is limited to the failure path.
+    """
+    if expected is not None and exists():
+        return jsonify({"error": f"{name} has been modified."}), 412
+
+    return jsonify({"error": f"{name} not found."}), 404
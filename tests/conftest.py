@@ -1,5 +1,6 @@
 import os
-import tempfile
+import sqlite3
+import uuid
 
 import pytest
 
@@ -9,26 +10,51 @@ from link_sharing_app.db import get_db, init_db
 with open(os.path.join(os.path.dirname(__file__), "data.sql"), "rb") as f:
     _data_sql = f.read().decode("utf8")
 
+TEST_CONFIG = {
+    "TESTING": True,
+    "SECRET_KEY": "test-secret-key-for-testing",
+    "CLICK_FLUSH_INTERVAL": 0,
+    "PURGE_IN_BACKGROUND": False,
+}
 
-@pytest.fixture
-def app():
-    db_fd, db_path = tempfile.mkstemp()
-    app = create_app(
-        {
-            "TESTING": True,
-            "DATABASE": db_path,
-            "SECRET_KEY": "test-secret-key-for-testing",
-        }
-    )
+
+@pytest.fixture(scope="session")
+def template_db():
+    """Build the schema and seed data once per test process.
+
+    The template lives in a private in-memory database, so every pytest-xdist
+    worker builds its own and workers never share state.
+    """
+    template = sqlite3.connect(":memory:")
+    app = create_app(TEST_CONFIG | {"DATABASE": ":memory:"})
 
     with app.app_context():
         init_db()
-        get_db().executescript(_data_sql)
+        db = get_db()
+        db.executescript(_data_sql)
+        db.backup(template)
+
+    yield template
+
+    template.close()
+
+
+@pytest.fixture
+def app(template_db, tmp_path):
+    # Every connection to a named shared-cache memory database sees the same
+    # data for as long as one of them stays open, so ``keeper`` holds the
+    # clone while the app opens and closes its own connections.
+    database = f"file:test-{uuid.uuid4().hex}?mode=memory&cache=shared"
+    keeper = sqlite3.connect(database, uri=True)
+    template_db.backup(keeper)
+
+    app = create_app(
+        TEST_CONFIG | {"DATABASE": database, "AVATAR_FOLDER": str(tmp_path / "avatars")}
+    )
 
     yield app
 
-    os.close(db_fd)
-    os.unlink(db_path)
+    keeper.close()
 
 
 @pytest.fixture
@@ -41,6 +67,20 @@ def runner(app):
     return app.test_cli_runner()
 
 
+@pytest.fixture
+def fail_on(app):
+    """Make writes of ``event`` on ``table`` fail with a constraint error."""
+
+    def fail_on(table, event):
+        with app.app_context():
+            get_db().execute(
+                f"CREATE TRIGGER fail_{table}_{event.lower()} BEFORE {event} ON "
+                f"{table} BEGIN SELECT RAISE(ABORT, 'Rejected by test'); END"
+            )
+
+    return fail_on
+
+
 class AuthActions:
     def __init__(self, client):
         self._client = client
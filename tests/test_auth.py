@@ -1,5 +1,9 @@
+import threading
+import time
+
 import pytest
 
+from link_sharing_app.auth import MemoryBudget, canonical_hash_method, hash_memory
 from link_sharing_app.db import get_db
 
 
@@ -141,6 +145,19 @@ def test_login_incorrect_password(client):
     assert response.get_json()["error"] == "Incorrect password."
 
 
+def test_login_plaintext_password(client, app):
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE users SET password = 'plain' WHERE id = 1")
+        db.commit()
+
+    response = client.post(
+        "/auth/login", json={"email": "test@gmail.com", "password": "plain"}
+    )
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Incorrect password."
+
+
 def test_login_success(client):
     email = "email@gmail.com"
     password = "strong_password"
@@ -165,3 +182,209 @@ def test_login_no_secret_key(client, app, monkeypatch):
             "/auth/login",
             json={"email": "test@gmail.com", "password": "strong_password"},
         )
+
+
+def register_and_login(client, auth):
+    client.post(
+        "/auth/register",
+        json={"email": "session@test.com", "password": "strong_password"},
+    )
+    return auth.login("session@test.com", "strong_password").get_json()["refresh_token"]
+
+
+def test_login_returns_refresh_token(client, auth):
+    client.post(
+        "/auth/register",
+        json={"email": "session@test.com", "password": "strong_password"},
+    )
+    response = auth.login("session@test.com", "strong_password")
+    assert response.status_code == 200
+    assert response.get_json()["refresh_token"]
+
+
+def test_refresh(client, auth):
+    refresh_token = register_and_login(client, auth)
+
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    json_data = response.get_json()
+    assert json_data["message"] == "Token refreshed successfully."
+    assert json_data["token"]
+    assert json_data["refresh_token"] != refresh_token
+
+
+def test_refresh_token_is_single_use(client, auth):
+    refresh_token = register_and_login(client, auth)
+    rotated = client.post(
+        "/auth/refresh", json={"refresh_token": refresh_token}
+    ).get_json()["refresh_token"]
+
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Invalid refresh token."
+
+    response = client.post("/auth/refresh", json={"refresh_token": rotated})
+    assert response.status_code == 401
+
+
+def test_refresh_expired_token(client, auth, app):
+    refresh_token = register_and_login(client, auth)
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE sessions SET expires = datetime('now', '-1 second')")
+        db.commit()
+
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+
+
+def test_refresh_deleted_user(client, auth):
+    refresh_token = register_and_login(client, auth)
+    client.delete("/users/3")
+
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+
+
+def test_refresh_unknown_token(client):
+    response = client.post("/auth/refresh", json={"refresh_token": "unknown"})
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Invalid refresh token."
+
+
+@pytest.mark.parametrize("body", ({}, {"refresh_token": 5}, {"refresh_token": ["a"]}))
+def test_refresh_missing_token(client, body):
+    response = client.post("/auth/refresh", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Refresh token is required."
+
+
+def test_refresh_invalid_json(client):
+    response = client.post(
+        "/auth/refresh", data="Invalid JSON", content_type="application/json"
+    )
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Invalid JSON data."
+
+
+def test_logout(client, auth):
+    refresh_token = register_and_login(client, auth)
+
+    response = client.post("/auth/logout", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    assert response.get_json()["message"] == "User logged out successfully."
+
+    response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("body", ({}, {"refresh_token": 5}, {"refresh_token": ["a"]}))
+def test_logout_missing_token(client, body):
+    response = client.post("/auth/logout", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Refresh token is required."
+
+
+def get_password_hash(app, email):
+    with app.app_context():
+        return (
+            get_db()
+            .execute("SELECT password FROM users WHERE email = ?", (email,))
+            .fetchone()["password"]
+        )
+
+
+def test_register_uses_hash_policy(client, app):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    client.post(
+        "/auth/register",
+        json={"email": "policy@test.com", "password": "strong_password"},
+    )
+    assert get_password_hash(app, "policy@test.com").startswith("pbkdf2:sha256:1000$")
+
+
+def test_login_rehashes_outdated_password(client, auth, app):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    client.post(
+        "/auth/register",
+        json={"email": "rehash@test.com", "password": "strong_password"},
+    )
+
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+    assert auth.login("rehash@test.com", "strong_password").status_code == 200
+    rehashed = get_password_hash(app, "rehash@test.com")
+    assert rehashed.startswith("pbkdf2:sha256:2000$")
+
+    assert auth.login("rehash@test.com", "strong_password").status_code == 200
+    assert get_password_hash(app, "rehash@test.com") == rehashed
+
+
+def test_login_does_not_rehash_on_wrong_password(client, auth, app):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    client.post(
+        "/auth/register",
+        json={"email": "wrong@test.com", "password": "strong_password"},
+    )
+
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+    assert auth.login("wrong@test.com", "bad_password").status_code == 401
+    assert get_password_hash(app, "wrong@test.com").startswith("pbkdf2:sha256:1000$")
+
+
+def test_edit_user_password_is_hashed(client, auth, app):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    response = client.patch("/users/1", json={"password": "new_password"})
+    assert response.status_code == 200
+    assert get_password_hash(app, "test@gmail.com").startswith("pbkdf2:sha256:1000$")
+    assert auth.login("test@gmail.com", "new_password").status_code == 200
+
+
+@pytest.mark.parametrize(
+    ("method", "canonical"),
+    (
+        ("scrypt", "scrypt:32768:8:1"),
+        ("scrypt:16384:8:2", "scrypt:16384:8:2"),
+        ("pbkdf2:sha256:50000", "pbkdf2:sha256:50000"),
+    ),
+)
+def test_canonical_hash_method(method, canonical):
+    assert canonical_hash_method(method) == canonical
+
+
+def test_canonical_hash_method_invalid():
+    with pytest.raises(ValueError, match="Invalid hash method 'md5'."):
+        canonical_hash_method("md5")
+
+
+def test_hash_memory():
+    assert hash_memory("scrypt:32768:8:1") == 32 * 1024 * 1024
+    assert hash_memory("pbkdf2:sha256:50000") < hash_memory("scrypt")
+
+
+def test_memory_budget_limits_concurrency():
+    budget = MemoryBudget(100)
+    running = []
+    peak = []
+
+    def work():
+        with budget.reserve(60):
+            running.append(1)
+            peak.append(len(running))
+            time.sleep(0.01)
+            running.pop()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 1
+
+
+def test_memory_budget_oversized_reservation():
+    budget = MemoryBudget(100)
+
+    with budget.reserve(500):
+        pass
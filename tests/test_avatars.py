@@ -0,0 +1,144 @@
+import base64
+import io
+
+import pytest
+
+from link_sharing_app.avatars import detect_image_type
+
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVR4nGP4z8AAAAMBAQDJ/pLvAAAAAElFTkSuQmCC"
+)
+
+
+def make_png(size):
+    image_module = pytest.importorskip("PIL.Image")
+    output = io.BytesIO()
+    image_module.new("RGB", (size, size), "red").save(output, format="PNG")
+    return output.getvalue()
+
+
+def upload(client, data, user_id=1):
+    return client.put(
+        f"/users/{user_id}/avatar", data=data, content_type="application/octet-stream"
+    )
+
+
+@pytest.mark.parametrize(
+    ("data", "extension"),
+    (
+        (PNG, "png"),
+        (b"\xff\xd8\xff\xe0rest", "jpg"),
+        (b"GIF89a...", "gif"),
+        (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "webp"),
+        (b"<svg></svg>", None),
+    ),
+)
+def test_detect_image_type(data, extension):
+    assert detect_image_type(data) == extension
+
+
+def test_upload_avatar(client, app, tmp_path):
+    response = upload(client, PNG)
+    assert response.status_code == 200
+
+    data = response.get_json()
+    assert data["message"] == "Avatar uploaded successfully."
+    image_url = data["data"]["image_url"]
+    assert image_url.startswith("/avatars/")
+    assert image_url.endswith(".png")
+    assert client.get("/users/1").get_json()["data"]["image_url"] == image_url
+
+    stored = list((tmp_path / "avatars").rglob("*.png"))
+    assert [path.read_bytes() for path in stored] == [PNG]
+
+
+def test_upload_avatar_deduplicates(client, tmp_path):
+    first = upload(client, PNG, 1).get_json()["data"]["image_url"]
+    second = upload(client, PNG, 2).get_json()["data"]["image_url"]
+
+    assert first == second
+    assert len(list((tmp_path / "avatars").rglob("*.png"))) == 1
+
+
+def test_upload_avatar_corrupt_image(client):
+    pytest.importorskip("PIL.Image")
+    response = upload(client, b"\x89PNG\r\n\x1a\n" + b"\x00" * 32)
+    assert response.status_code == 415
+
+
+def test_upload_avatar_unsupported_format(client):
+    response = upload(client, b"<svg></svg>")
+    assert response.status_code == 415
+    assert response.get_json() == {"error": "Unsupported image format."}
+
+
+def test_upload_avatar_too_large(client, app):
+    app.config["AVATAR_MAX_BYTES"] = 8
+    response = upload(client, PNG)
+    assert response.status_code == 413
+    assert response.get_json() == {"error": "Image is too large."}
+
+
+def test_upload_avatar_user_not_found(client):
+    response = upload(client, PNG, 9999)
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "User not found."}
+
+
+def test_get_avatar_cache_headers(client):
+    image_url = upload(client, PNG).get_json()["data"]["image_url"]
+
+    response = client.get(image_url)
+    assert response.status_code == 200
+    assert response.data == PNG
+    assert response.mimetype == "image/png"
+    assert response.cache_control.immutable
+    assert response.cache_control.public
+    assert response.cache_control.max_age == 365 * 24 * 60 * 60
+
+
+def test_get_avatar_not_found(client):
+    response = client.get(f"/avatars/{'0' * 64}.png")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Avatar not found."}
+
+
+def test_get_avatar_invalid_name(client):
+    response = client.get("/avatars/..%2Fsecret.png")
+    assert response.status_code == 404
+
+
+def test_get_user_avatar_redirects(client):
+    image_url = upload(client, PNG).get_json()["data"]["image_url"]
+
+    response = client.get("/users/1/avatar")
+    assert response.status_code == 302
+    assert response.headers["Location"] == image_url
+
+
+def test_get_user_avatar_not_found(client):
+    response = client.get("/users/1/avatar")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Avatar not found."}
+
+
+def test_upload_avatar_generates_variants(client):
+    original = make_png(300)
+    image_url = upload(client, original).get_json()["data"]["image_url"]
+
+    response = client.get("/users/1/avatar?size=128")
+    assert response.status_code == 302
+    variant_url = response.headers["Location"]
+    assert variant_url != image_url
+    assert variant_url.endswith("-128.png")
+
+    variant = client.get(variant_url).data
+    image_module = pytest.importorskip("PIL.Image")
+    assert image_module.open(io.BytesIO(variant)).size == (128, 128)
+
+
+def test_get_user_avatar_unknown_size_uses_original(client):
+    image_url = upload(client, make_png(300)).get_json()["data"]["image_url"]
+
+    response = client.get("/users/1/avatar?size=100")
+    assert response.headers["Location"] == image_url
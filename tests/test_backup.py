@@ -0,0 +1,101 @@
+import sqlite3
+
+import pytest
+
+from link_sharing_app.backup import backup_database, check_integrity, copy_database
+from link_sharing_app.db import get_db
+
+
+@pytest.fixture
+def backup_app(app, tmp_path):
+    app.config["BACKUP_FOLDER"] = str(tmp_path / "backups")
+    app.config["BACKUP_STEP_PAUSE"] = 0
+    return app
+
+
+def list_backups(tmp_path):
+    return sorted((tmp_path / "backups").iterdir())
+
+
+def test_backup_command(runner, backup_app, tmp_path):
+    result = runner.invoke(args=["backup", "--pages", "1"])
+    assert result.exit_code == 0
+    assert "pages/s" in result.output
+    assert "longest step" in result.output
+
+    (path,) = list_backups(tmp_path)
+    assert path.name.startswith("link_sharing_app-")
+    assert path.suffix == ".sqlite"
+
+    with sqlite3.connect(path) as backup:
+        emails = [
+            row[0] for row in backup.execute("SELECT email FROM users ORDER BY id")
+        ]
+    assert emails == ["test@gmail.com", "other@wp.pl"]
+
+
+def test_copy_database_in_steps():
+    source = sqlite3.connect(":memory:")
+    source.execute("CREATE TABLE t (value TEXT)")
+    source.executemany("INSERT INTO t VALUES (?)", [("x" * 1000,)] * 100)
+    source.commit()
+    target = sqlite3.connect(":memory:")
+
+    pages, longest_step, restarts = copy_database(source, target, 2, 0)
+
+    assert pages == source.execute("PRAGMA page_count").fetchone()[0]
+    assert pages > 2
+    assert longest_step >= 0
+    assert restarts == 0
+    assert target.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 100
+
+
+def test_backup_keeps_newest(backup_app, tmp_path):
+    backup_app.config["BACKUP_KEEP"] = 2
+
+    with backup_app.app_context():
+        reports = [backup_database() for _ in range(3)]
+
+    assert list_backups(tmp_path) == [report.path for report in reports[1:]]
+
+
+def test_backup_keep_zero_keeps_all(backup_app, tmp_path):
+    backup_app.config["BACKUP_KEEP"] = 0
+
+    with backup_app.app_context():
+        reports = [backup_database() for _ in range(2)]
+
+    assert list_backups(tmp_path) == [report.path for report in reports]
+
+
+def test_backup_never_prunes_new_backup(backup_app, tmp_path):
+    backup_app.config["BACKUP_KEEP"] = 1
+    newer = tmp_path / "backups" / "link_sharing_app-99991231T000000000000Z.sqlite"
+    newer.parent.mkdir()
+    newer.touch()
+
+    with backup_app.app_context():
+        report = backup_database()
+
+    assert list_backups(tmp_path) == [report.path, newer]
+
+
+def test_backup_failed_integrity_check(backup_app, tmp_path, monkeypatch):
+    def fail(db):
+        raise sqlite3.DatabaseError("Backup failed the integrity check: broken.")
+
+    monkeypatch.setattr("link_sharing_app.backup.check_integrity", fail)
+    result = backup_app.test_cli_runner().invoke(args=["backup"])
+
+    assert result.exit_code != 0
+    assert "Backup failed the integrity check: broken." in result.output
+    assert list_backups(tmp_path) == []
+
+
+def test_check_integrity(app):
+    with app.app_context():
+        check_integrity(get_db())
+
+
+def test_scheduler_disabled_by_default(app):
+    assert "backup" not in app.extensions
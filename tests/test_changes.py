@@ -0,0 +1,109 @@
+import pytest
+
+from link_sharing_app.purge import run_pending_purges
+
+
+def get_changes(client, query=""):
+    response = client.get(f"/changes{query}")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def summarize(changes):
+    return [(change["entity"], change["id"], change["op"]) for change in changes]
+
+
+def test_seed_changes(client):
+    body = get_changes(client)
+
+    assert summarize(body["data"]) == [
+        ("user", 1, "insert"),
+        ("user", 2, "insert"),
+        ("link", 1, "insert"),
+        ("link", 2, "insert"),
+    ]
+    assert body["data"][2]["data"]["url"] == "https://github.com/TestTestowy"
+    assert body["next"] == 4
+    assert body["has_more"] is False
+
+
+def test_link_changes(client):
+    response = client.post(
+        "/links/",
+        json={"user_id": 1, "platform": "GitLab", "url": "https://gitlab.com/test"},
+    )
+    link_id = response.get_json()["data"]["id"]
+    client.patch(f"/links/{link_id}", json={"platform": "GitHub"})
+    client.delete(f"/links/{link_id}")
+
+    body = get_changes(client, "?since=4")
+    assert summarize(body["data"]) == [
+        ("link", link_id, "insert"),
+        ("link", link_id, "update"),
+        ("link", link_id, "delete"),
+    ]
+    assert [change["version"] for change in body["data"]] == [1, 2, 2]
+    assert all(change["data"] is None for change in body["data"])
+
+
+def test_user_changes(client, app):
+    client.patch("/users/1", json={"first_name": "Changed"})
+    client.delete("/users/1")
+
+    with app.app_context():
+        run_pending_purges()
+
+    body = get_changes(client, "?since=4")
+    assert summarize(body["data"]) == [
+        ("user", 1, "update"),
+        ("user", 1, "delete"),
+        ("link", 1, "delete"),
+    ]
+
+
+def test_changes_current_data(client):
+    client.patch("/links/1", json={"platform": "GitLab"})
+
+    body = get_changes(client, "?since=2")
+    assert [change["data"]["platform"] for change in body["data"][:3]] == [
+        "GitLab",
+        "LinkedIn",
+        "GitLab",
+    ]
+
+
+def test_changes_pagination(client):
+    body = get_changes(client, "?limit=3")
+    assert [change["seq"] for change in body["data"]] == [1, 2, 3]
+    assert body["has_more"] is True
+
+    body = get_changes(client, f"?since={body['next']}&limit=3")
+    assert [change["seq"] for change in body["data"]] == [4]
+    assert body["has_more"] is False
+
+    body = get_changes(client, f"?since={body['next']}")
+    assert body["data"] == []
+    assert body["next"] == 4
+
+
+def test_changes_for_user(client):
+    body = get_changes(client, "?user_id=2")
+    assert summarize(body["data"]) == [("user", 2, "insert"), ("link", 2, "insert")]
+
+
+@pytest.mark.parametrize(
+    "query",
+    (
+        "?since=a",
+        "?since=-1",
+        "?since=99999999999999999999",
+        "?limit=0",
+        "?limit=501",
+        "?user_id=x",
+        "?user_id=99999999999999999999",
+    ),
+)
+def test_changes_validation(client, query):
+    response = client.get(f"/changes{query}")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid page parameters."}
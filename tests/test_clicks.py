@@ -0,0 +1,132 @@
+from link_sharing_app.clicks import get_click_buffer
+from link_sharing_app.db import get_db
+from link_sharing_app.links import LinkTargetCache
+
+
+def test_follow_link_redirects(client):
+    response = client.get("/r/1")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "https://github.com/TestTestowy"
+
+
+def test_follow_link_not_found(client):
+    response = client.get("/r/9999")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Link not found."}
+
+
+def test_follow_link_buffers_clicks(client, app):
+    for _ in range(3):
+        client.get("/r/1")
+
+    with app.app_context():
+        assert get_click_buffer().pending(1) == 3
+        assert (
+            get_db().execute("SELECT * FROM link_clicks WHERE link_id = 1").fetchone()
+            is None
+        )
+
+
+def test_flush_persists_clicks(client, app):
+    client.get("/r/1")
+    client.get("/r/1")
+    client.get("/r/2")
+
+    with app.app_context():
+        assert get_click_buffer().flush() == 3
+        assert get_click_buffer().pending(1) == 0
+        rows = get_db().execute("SELECT link_id, clicks FROM link_clicks").fetchall()
+        assert {row["link_id"]: row["clicks"] for row in rows} == {1: 2, 2: 1}
+
+    client.get("/r/1")
+
+    with app.app_context():
+        get_click_buffer().flush()
+        assert (
+            get_db()
+            .execute("SELECT clicks FROM link_clicks WHERE link_id = 1")
+            .fetchone()["clicks"]
+            == 3
+        )
+
+
+def test_flush_threshold(client, app):
+    app.config["CLICK_FLUSH_THRESHOLD"] = 2
+    client.get("/r/1")
+    client.get("/r/1")
+
+    with app.app_context():
+        assert get_click_buffer().pending(1) == 0
+        assert (
+            get_db()
+            .execute("SELECT clicks FROM link_clicks WHERE link_id = 1")
+            .fetchone()["clicks"]
+            == 2
+        )
+
+
+def test_flush_threshold_failure_still_redirects(client, app, fail_on):
+    app.config["CLICK_FLUSH_THRESHOLD"] = 2
+    fail_on("link_clicks", "INSERT")
+    client.get("/r/1")
+    response = client.get("/r/1")
+
+    assert response.status_code == 302
+    assert response.headers["Location"] == "https://github.com/TestTestowy"
+
+    with app.app_context():
+        assert get_click_buffer().pending(1) == 2
+
+
+def test_get_link_clicks_merges_pending(client, app):
+    client.get("/r/1")
+    with app.app_context():
+        get_click_buffer().flush()
+    client.get("/r/1")
+
+    response = client.get("/links/1/clicks")
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "data": {"link_id": 1, "clicks": 2},
+        "message": "Success.",
+    }
+
+
+def test_get_link_clicks_not_found(client):
+    response = client.get("/links/9999/clicks")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Link not found."}
+
+
+def test_edit_link_invalidates_target(client):
+    client.get("/r/1")
+    client.patch("/links/1", json={"url": "https://github.com/Renamed"})
+
+    response = client.get("/r/1")
+    assert response.headers["Location"] == "https://github.com/Renamed"
+
+
+def test_delete_link_invalidates_target(client):
+    client.get("/r/1")
+    client.delete("/links/1")
+
+    response = client.get("/r/1")
+    assert response.status_code == 404
+
+
+def test_link_target_cache_is_bounded():
+    targets = LinkTargetCache(2)
+
+    for id in (1, 2, 3):
+        targets.put(id, f"https://example.com/{id}")
+
+    assert targets.get(1) is None
+    assert targets.get(3) == "https://example.com/3"
+
+
+def test_follow_link_without_target_cache(client, app):
+    app.extensions["link_targets"] = LinkTargetCache(0)
+
+    assert client.get("/r/1").status_code == 302
+    assert client.get("/r/2").status_code == 302
+    assert app.extensions["link_targets"].get(1) is None
@@ -0,0 +1,125 @@
+import threading
+import time
+
+from link_sharing_app import auth
+from link_sharing_app.db import get_db
+from link_sharing_app.idempotency import IdempotencyStore
+
+LINK = {"user_id": 1, "platform": "GitLab", "url": "https://gitlab.com/test"}
+
+
+def count_links(app):
+    with app.app_context():
+        return get_db().execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+
+def test_replay_create_link(client, app):
+    headers = {"Idempotency-Key": "create-1"}
+
+    first = client.post("/links/", json=LINK, headers=headers)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    second = client.post("/links/", json=LINK, headers=headers)
+    assert second.status_code == 201
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.get_json() == first.get_json()
+    assert count_links(app) == 3
+
+
+def test_without_key_is_not_replayed(client):
+    assert client.post("/links/", json=LINK).status_code == 201
+    assert client.post("/links/", json=LINK).status_code == 409
+
+
+def test_key_is_bound_to_request(client):
+    headers = {"Idempotency-Key": "create-1"}
+    client.post("/links/", json=LINK, headers=headers)
+
+    response = client.post(
+        "/links/", json=LINK | {"platform": "GitHub"}, headers=headers
+    )
+    assert response.status_code == 422
+    assert response.get_json() == {
+        "error": "Idempotency-Key was used for a different request."
+    }
+
+
+def test_key_is_scoped_to_endpoint(client):
+    headers = {"Idempotency-Key": "shared"}
+    client.post("/links/", json=LINK, headers=headers)
+
+    response = client.post(
+        "/auth/register",
+        json={"email": "key@test.com", "password": "password"},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+
+
+def test_invalid_key(client):
+    response = client.post("/links/", json=LINK, headers={"Idempotency-Key": "x" * 256})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid Idempotency-Key header."}
+
+
+def test_concurrent_register_hashes_once(app, monkeypatch):
+    calls = []
+
+    def slow_hash(password):
+        calls.append(password)
+        time.sleep(0.2)
+        return f"hashed:{password}"
+
+    monkeypatch.setattr(auth, "hash_password", slow_hash)
+    responses = []
+
+    def register():
+        response = app.test_client().post(
+            "/auth/register",
+            json={"email": "retry@test.com", "password": "password"},
+            headers={"Idempotency-Key": "register-1"},
+        )
+        responses.append(response)
+
+    threads = [threading.Thread(target=register) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [response.status_code for response in responses] == [201, 201, 201]
+    assert sum("Idempotent-Replayed" in r.headers for r in responses) == 2
+
+
+def test_store_evicts_oldest_and_expired(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("link_sharing_app.idempotency.time.monotonic", lambda: now[0])
+    store = IdempotencyStore(max_keys=2, ttl=10)
+
+    for key in ("a", "b", "c"):
+        entry, owner = store.begin(key, b"")
+        assert owner
+        store.complete(key, entry, (201, [], b""))
+
+    assert store.begin("a", b"")[1] is True
+
+    now[0] = 11.0
+    entry, owner = store.begin("c", b"")
+    assert owner
+
+
+def test_store_abandon_allows_retry():
+    store = IdempotencyStore(max_keys=10, ttl=10)
+    entry, _ = store.begin("a", b"")
+    waiter, owner = store.begin("a", b"")
+    assert waiter is entry
+    assert not owner
+
+    store.abandon("a", entry)
+    assert entry.done.is_set()
+    assert entry.response is None
+    assert store.begin("a", b"")[1] is True
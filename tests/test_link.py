@@ -1,6 +1,6 @@
-from link_sharing_app.db import get_db
+import pytest
 
-from .fake_db import FakeConnection
+from link_sharing_app.db import get_db
 
 
 def test_get_all_links_success(client):
@@ -31,7 +31,12 @@ def test_create_link_success(client, app):
     assert response.status_code == 201
 
     data = response.get_json()
-    assert data == {"message": "Link created successfully."}
+    assert data["message"] == "Link created successfully."
+    assert data["data"]["user_id"] == 1
+    assert data["data"]["platform"] == "Twitter"
+    assert data["data"]["url"] == "https://twitter.com/some_profile"
+    assert data["data"]["version"] == 1
+    assert response.headers["ETag"] == '"1"'
 
     with app.app_context():
         db = get_db()
@@ -86,15 +91,13 @@ def test_create_link_missing_url(client):
     assert data == {"error": "Url is required."}
 
 
-def test_create_link_integrity_error(client, monkeypatch):
-    monkeypatch.setattr("link_sharing_app.links.get_db", lambda: FakeConnection())
-
+def test_create_link_integrity_error(client):
     response = client.post(
         "/links/",
         json={
             "user_id": 1,
             "platform": "Twitter",
-            "url": "https://twitter.com/some_profile",
+            "url": "https://github.com/TestTestowy",
         },
     )
     assert response.status_code == 409
@@ -110,7 +113,11 @@ def test_edit_link_by_id_success(client, app):
     assert response.status_code == 200
 
     data = response.get_json()
-    assert data == {"message": "Link edited successfully."}
+    assert data["message"] == "Link edited successfully."
+    assert data["data"]["platform"] == "LinkedIn"
+    assert data["data"]["url"] == "https://linked.in/new_profile"
+    assert data["data"]["version"] == 2
+    assert response.headers["ETag"] == '"2"'
 
     with app.app_context():
         db = get_db()
@@ -121,6 +128,37 @@ def test_edit_link_by_id_success(client, app):
         assert link_in_db["url"] == "https://linked.in/new_profile"
 
 
+def test_edit_link_by_id_if_match(client):
+    response = client.patch(
+        "/links/1", json={"platform": "GitHub"}, headers={"If-Match": '"1"'}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] == '"2"'
+
+    response = client.patch(
+        "/links/1", json={"platform": "GitLab"}, headers={"If-Match": '"1"'}
+    )
+    assert response.status_code == 412
+    assert response.get_json() == {"error": "Link has been modified."}
+
+
+def test_edit_link_by_id_if_match_not_found(client):
+    response = client.patch(
+        "/links/9999", json={"platform": "GitHub"}, headers={"If-Match": '"1"'}
+    )
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Link not found."}
+
+
+@pytest.mark.parametrize("if_match", ('"one"', '"99999999999999999999"'))
+def test_edit_link_by_id_invalid_if_match(client, if_match):
+    response = client.patch(
+        "/links/1", json={"platform": "GitHub"}, headers={"If-Match": if_match}
+    )
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid If-Match header."}
+
+
 def test_edit_link_by_id_not_found(client):
     response = client.patch("/links/9999", json={"platform": "Twitter"})
     assert response.status_code == 404
@@ -142,10 +180,14 @@ def test_edit_link_by_id_invalid_field(client):
     assert data == {"error": "Invalid field."}
 
 
-def test_edit_link_by_id_integrity_error(client, monkeypatch):
-    monkeypatch.setattr("link_sharing_app.links.get_db", lambda: FakeConnection())
-
-    response = client.patch("/links/1", json={"platform": "Twitter", "url": "any"})
+def test_edit_link_by_id_integrity_error(client):
+    response = client.patch(
+        "/links/1",
+        json={
+            "platform": "Twitter",
+            "url": "https://www.linkedin.com/in/anonimowy-anonim",
+        },
+    )
     assert response.status_code == 500
     data = response.get_json()
     assert data["error"] == "Database integrity error"
@@ -155,7 +197,8 @@ def test_delete_link_by_id_success(client, app):
     response = client.delete("/links/1")
     assert response.status_code == 200
     data = response.get_json()
-    assert data == {"message": "Link deleted successfully."}
+    assert data["message"] == "Link deleted successfully."
+    assert data["data"]["id"] == 1
 
     with app.app_context():
         db = get_db()
@@ -163,6 +206,15 @@ def test_delete_link_by_id_success(client, app):
         assert link_in_db is None
 
 
+def test_delete_link_by_id_if_match(client):
+    response = client.delete("/links/1", headers={"If-Match": '"2"'})
+    assert response.status_code == 412
+    assert response.get_json() == {"error": "Link has been modified."}
+
+    response = client.delete("/links/1", headers={"If-Match": '"1"'})
+    assert response.status_code == 200
+
+
 def test_delete_link_by_id_not_found(client):
     response = client.delete("/links/9999")
     assert response.status_code == 404
@@ -170,10 +222,156 @@ def test_delete_link_by_id_not_found(client):
     assert data == {"error": "Link not found."}
 
 
-def test_delete_link_by_id_integrity_error(client, monkeypatch):
-    monkeypatch.setattr("link_sharing_app.links.get_db", lambda: FakeConnection())
+def test_delete_link_by_id_integrity_error(client, fail_on):
+    fail_on("links", "DELETE")
 
     response = client.delete("/links/1")
     assert response.status_code == 500
     data = response.get_json()
     assert data["error"] == "Database integrity error"
+
+
+def add_links(client, count, user_id=1):
+    return [
+        client.post(
+            "/links/",
+            json={
+                "user_id": user_id,
+                "platform": "GitLab",
+                "url": f"https://gitlab.com/user{user_id}-{i}",
+            },
+        ).get_json()["data"]["id"]
+        for i in range(count)
+    ]
+
+
+def link_order(client, user_id=1):
+    return [link["id"] for link in client.get(f"/links/{user_id}").get_json()["data"]]
+
+
+def test_create_link_goes_first(client):
+    ids = add_links(client, 2)
+    assert link_order(client) == [ids[1], ids[0], 1]
+
+
+@pytest.mark.parametrize(
+    ("move", "order"),
+    (
+        ({"after": None}, [1, 3, 4, 5]),
+        ({"before": None}, [3, 4, 5, 1]),
+        ({"after": 4}, [3, 4, 1, 5]),
+        ({"before": 4}, [3, 1, 4, 5]),
+    ),
+)
+def test_move_link(client, app, move, order):
+    add_links(client, 3)
+    assert link_order(client) == [5, 4, 3, 1]
+    client.patch("/links/5/move", json={"before": None})
+    client.patch("/links/3/move", json={"after": None})
+    assert link_order(client) == [3, 4, 1, 5]
+
+    with app.app_context():
+        before = {
+            row["id"]: row["version"]
+            for row in get_db().execute("SELECT id, version FROM links")
+        }
+
+    response = client.patch("/links/1/move", json=move)
+    assert response.status_code == 200
+    assert response.get_json()["message"] == "Link moved successfully."
+    assert response.headers["ETag"] == f'"{before[1] + 1}"'
+    assert link_order(client) == order
+
+    with app.app_context():
+        after = {
+            row["id"]: row["version"]
+            for row in get_db().execute("SELECT id, version FROM links")
+        }
+
+    assert {id for id in after if after[id] != before[id]} == {1}
+
+
+def test_move_link_rebalances_long_positions(client, app):
+    app.config["LINK_POSITION_MAX_LENGTH"] = 2
+    ids = add_links(client, 3)
+
+    for _ in range(20):
+        client.patch(f"/links/{ids[0]}/move", json={"after": ids[2]})
+        client.patch(f"/links/{ids[0]}/move", json={"before": ids[1]})
+
+    links = client.get("/links/1").get_json()["data"]
+    assert [link["id"] for link in links] == [ids[2], ids[0], ids[1], 1]
+    assert all(len(link["position"]) <= 2 for link in links)
+
+
+def test_move_link_with_equal_positions(client, app):
+    ids = add_links(client, 2)
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE links SET position = 'V' WHERE user_id = 1")
+        db.commit()
+
+    response = client.patch("/links/1/move", json={"after": ids[0]})
+    assert response.status_code == 200
+    order = link_order(client)
+    assert order.index(1) == order.index(ids[0]) + 1
+
+
+def test_move_link_if_match(client):
+    add_links(client, 1)
+
+    response = client.patch(
+        "/links/1/move", json={"after": None}, headers={"If-Match": '"2"'}
+    )
+    assert response.status_code == 412
+    assert response.get_json() == {"error": "Link has been modified."}
+
+
+def test_move_link_if_match_does_not_rebalance(client, app):
+    ids = add_links(client, 3)
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE links SET position = 'V' WHERE user_id = 1")
+        db.commit()
+        before = db.execute("SELECT id, position, version FROM links").fetchall()
+        changes = db.execute("SELECT count(*) FROM changes").fetchone()[0]
+
+    response = client.patch(
+        f"/links/{ids[0]}/move", json={"after": ids[1]}, headers={"If-Match": '"2"'}
+    )
+    assert response.status_code == 412
+
+    with app.app_context():
+        db = get_db()
+        after = db.execute("SELECT id, position, version FROM links").fetchall()
+        assert [tuple(row) for row in after] == [tuple(row) for row in before]
+        assert db.execute("SELECT count(*) FROM changes").fetchone()[0] == changes
+
+
+@pytest.mark.parametrize(
+    ("id", "move", "status", "error"),
+    (
+        (1, {}, 400, "Send exactly one of after or before."),
+        (
+            1,
+            {"after": None, "before": None},
+            400,
+            "Send exactly one of after or before.",
+        ),
+        (1, {"position": "a"}, 400, "Send exactly one of after or before."),
+        (1, {"after": 2}, 400, "Invalid anchor link."),
+        (1, {"after": 1}, 400, "Invalid anchor link."),
+        (1, {"after": 9999}, 400, "Invalid anchor link."),
+        (1, {"after": 10**30}, 400, "Invalid anchor link."),
+        (1, {"before": {"a": 1}}, 400, "Invalid anchor link."),
+        (1, {"after": "3"}, 400, "Invalid anchor link."),
+        (1, {"after": True}, 400, "Invalid anchor link."),
+        (9999, {"after": None}, 404, "Link not found."),
+    ),
+)
+def test_move_link_invalid(client, id, move, status, error):
+    response = client.patch(f"/links/{id}/move", json=move)
+    assert response.status_code == status
+    assert response.get_json() == {"error": error}
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from link_sharing_app.positions import key_between, spread_keys
+
+
+def test_key_between_keeps_order():
+    rng = random.Random(0)
+    keys = [key_between(None, None)]
+
+    for _ in range(2000):
+        i = rng.randint(0, len(keys))
+        before = keys[i - 1] if i > 0 else None
+        after = keys[i] if i < len(keys) else None
+        key = key_between(before, after)
+        keys.insert(i, key)
+
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    assert not any(key.endswith("0") for key in keys)
+
+
+def test_key_between_steps_at_the_ends():
+    key = None
+
+    for _ in range(100):
+        key = key_between(None, key)
+
+    assert len(key) == 4
+
+    assert key_between("V", None) == "W"
+    assert key_between("zzV", None) == "zzW"
+
+
+def test_key_between_rejects_unordered_bounds():
+    with pytest.raises(ValueError):
+        key_between("V", "V")
+
+
+@pytest.mark.parametrize("count", (0, 1, 61, 62, 1000))
+def test_spread_keys(count):
+    keys = spread_keys(count)
+
+    assert len(keys) == count
+    assert keys == sorted(set(keys))
+    assert all(keys) and not any(key.endswith("0") for key in keys)
@@ -0,0 +1,82 @@
+from link_sharing_app import repository
+from link_sharing_app.db import get_db
+
+
+def stored_profile(app, user_id):
+    with app.app_context():
+        return repository.get_profile(get_db(), user_id)
+
+
+def test_get_profile(client, app):
+    assert stored_profile(app, 1) is None
+
+    response = client.get("/profiles/1")
+    assert response.status_code == 200
+    assert response.mimetype == "application/json"
+
+    data = response.get_json()["data"]
+    assert data["email"] == "test@gmail.com"
+    assert [link["url"] for link in data["links"]] == ["https://github.com/TestTestowy"]
+    assert stored_profile(app, 1) == response.data
+
+
+def test_get_profile_not_found(client, app, monkeypatch):
+    def fail(*args):
+        raise AssertionError("A missing profile must not be written.")
+
+    monkeypatch.setattr(repository, "delete_profile", fail)
+    monkeypatch.setattr(repository, "save_profile", fail)
+
+    response = client.get("/profiles/999")
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "User not found."
+    assert stored_profile(app, 999) is None
+
+
+def test_profile_follows_link_writes(client):
+    client.get("/profiles/1")
+
+    response = client.post(
+        "/links/",
+        json={"user_id": 1, "platform": "GitLab", "url": "https://gitlab.com/test"},
+    )
+    link_id = response.get_json()["data"]["id"]
+    links = client.get("/profiles/1").get_json()["data"]["links"]
+    assert [link["id"] for link in links] == [link_id, 1]
+
+    client.patch(f"/links/{link_id}", json={"platform": "GitHub"})
+    links = client.get("/profiles/1").get_json()["data"]["links"]
+    assert links[0]["platform"] == "GitHub"
+
+    client.delete(f"/links/{link_id}")
+    links = client.get("/profiles/1").get_json()["data"]["links"]
+    assert [link["id"] for link in links] == [1]
+
+
+def test_profile_follows_user_writes(client, app):
+    client.get("/profiles/1")
+
+    client.patch("/users/1", json={"first_name": "Changed"})
+    assert client.get("/profiles/1").get_json()["data"]["first_name"] == "Changed"
+
+    client.delete("/users/1")
+    assert stored_profile(app, 1) is None
+    assert client.get("/profiles/1").status_code == 404
+
+
+def test_profile_not_changed_by_failed_write(client, app):
+    body = client.get("/profiles/1").data
+
+    response = client.patch(
+        "/links/1", json={"url": "https://www.linkedin.com/in/anonimowy-anonim"}
+    )
+    assert response.status_code == 500
+    assert stored_profile(app, 1) == body
+
+
+def test_rebuild_profiles_command(runner, app):
+    result = runner.invoke(args=["rebuild-profiles"])
+    assert "Rebuilt 2 profiles." in result.output
+
+    assert stored_profile(app, 1) is not None
+    assert stored_profile(app, 2) is not None
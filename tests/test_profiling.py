@@ -0,0 +1,84 @@
+import pytest
+
+from link_sharing_app import create_app
+from link_sharing_app.profiling import start_profile
+
+from .conftest import TEST_CONFIG
+
+
+@pytest.fixture
+def profiled_app(app, tmp_path):
+    def profiled_app(**config):
+        return create_app(
+            TEST_CONFIG
+            | {
+                "DATABASE": app.config["DATABASE"],
+                "PROFILE_FOLDER": str(tmp_path / "profiles"),
+            }
+            | config
+        )
+
+    return profiled_app
+
+
+def captured(tmp_path, pattern="*.prof"):
+    return sorted((tmp_path / "profiles").glob(pattern))
+
+
+def test_profiling_disabled_by_default(app, client, tmp_path):
+    assert start_profile not in app.before_request_funcs.get(None, [])
+
+    client.get("/")
+    assert captured(tmp_path) == []
+
+
+def test_profile_header(profiled_app, tmp_path):
+    client = profiled_app(PROFILE_TOKEN="secret").test_client()
+
+    client.get("/", headers={"X-Profile": "wrong"})
+    assert captured(tmp_path) == []
+
+    client.get("/links/1", headers={"X-Profile": "secret"})
+    (profile,) = captured(tmp_path)
+    assert "-links.get_all_links-" in profile.name
+    assert profile.with_suffix(".mem.txt").is_file()
+
+
+def test_profile_endpoints(profiled_app, tmp_path):
+    client = profiled_app(
+        PROFILE_ENDPOINTS=("health_check",), PROFILE_MEMORY=False
+    ).test_client()
+
+    client.get("/users/1")
+    client.get("/")
+    (profile,) = captured(tmp_path)
+    assert "-health_check-" in profile.name
+    assert captured(tmp_path, "*.mem.txt") == []
+
+
+def test_profile_sample_rate(profiled_app, tmp_path):
+    client = profiled_app(PROFILE_SAMPLE_RATE=1.0).test_client()
+
+    client.get("/")
+    client.get("/missing")
+    assert len(captured(tmp_path)) == 2
+
+
+def test_profiling_commands(profiled_app, tmp_path):
+    app = profiled_app(PROFILE_SAMPLE_RATE=1.0)
+    app.test_client().get("/users/1")
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["profiling", "list"])
+    (profile,) = captured(tmp_path)
+    assert profile.stem in result.output
+    assert " ms" in result.output
+
+    result = runner.invoke(args=["profiling", "show", profile.stem, "--limit", "5"])
+    assert result.exit_code == 0
+    assert "function calls" in result.output
+    assert "Allocation changes by line:" in result.output
+
+    result = runner.invoke(args=["profiling", "show", "missing"])
+    assert result.exit_code != 0
+    assert "Profile not found: missing." in result.output
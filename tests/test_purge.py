@@ -0,0 +1,121 @@
+from link_sharing_app.db import get_db
+from link_sharing_app.purge import PurgeWorker, run_pending_purges
+
+
+def add_links(app, user_id, count):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO links (user_id, platform, url) VALUES (?, 'GitHub', ?)",
+            [(user_id, f"https://github.com/user{i}") for i in range(count)],
+        )
+        db.commit()
+
+
+def test_delete_user_hides_user_and_links(client):
+    client.get("/r/1")
+
+    response = client.delete("/users/1")
+    assert response.status_code == 202
+
+    assert client.get("/users/1").status_code == 404
+    assert client.get("/links/1").status_code == 404
+    assert client.patch("/links/1", json={"platform": "GitHub"}).status_code == 404
+    assert client.get("/r/1").status_code == 404
+    assert client.get("/r/2").status_code == 302
+
+
+def test_deleted_user_cannot_login(client, auth):
+    client.delete("/users/1")
+
+    response = auth.login()
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "User is not found."
+
+
+def test_deletion_progress_pending(client):
+    client.delete("/users/1")
+
+    response = client.get("/users/1/deletion")
+    assert response.status_code == 200
+    data = response.get_json()["data"]
+    assert data["user_id"] == 1
+    assert data["purged_links"] == 0
+    assert data["remaining_links"] == 1
+    assert data["finished"] is None
+
+
+def test_deletion_progress_not_found(client):
+    response = client.get("/users/1/deletion")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Deletion not found."}
+
+
+def test_run_pending_purges(client, app):
+    app.config["PURGE_BATCH_SIZE"] = 2
+    app.config["PURGE_BATCH_PAUSE"] = 0
+    add_links(app, 1, 4)
+    client.delete("/users/1")
+
+    with app.app_context():
+        assert run_pending_purges() == 1
+        db = get_db()
+        assert db.execute("SELECT * FROM links WHERE user_id = 1").fetchone() is None
+        assert db.execute("SELECT * FROM users WHERE id = 1").fetchone() is None
+        assert db.execute("SELECT * FROM links WHERE user_id = 2").fetchone()
+
+    data = client.get("/users/1/deletion").get_json()["data"]
+    assert data["purged_links"] == 5
+    assert data["remaining_links"] == 0
+    assert data["finished"] is not None
+
+
+def test_run_pending_purges_skips_finished(client, app):
+    client.delete("/users/1")
+
+    with app.app_context():
+        assert run_pending_purges() == 1
+        assert run_pending_purges() == 0
+
+
+def test_purge_users_command(client, runner, app):
+    client.delete("/users/2")
+
+    result = runner.invoke(args=["purge-users"])
+    assert "Purged 1 deleted users." in result.output
+
+    with app.app_context():
+        assert get_db().execute("SELECT * FROM users WHERE id = 2").fetchone() is None
+
+
+def test_create_link_for_deleted_user(client):
+    client.delete("/users/1")
+
+    response = client.post(
+        "/links/",
+        json={"user_id": 1, "platform": "GitLab", "url": "https://gitlab.com/test"},
+    )
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "User not found."}
+
+
+def test_first_request_resumes_pending_purges(client, app, monkeypatch):
+    client.delete("/users/1")
+    worker = PurgeWorker(app)
+    woken = []
+    monkeypatch.setattr(worker, "wake", lambda: woken.append(True))
+    app.extensions["purge"] = worker
+    app.before_request_funcs[None].append(worker.resume)
+
+    client.get("/users/2")
+    client.get("/users/2")
+    assert woken == [True]
+
+
+def test_first_request_without_pending_purges(client, app, monkeypatch):
+    worker = app.extensions["purge"]
+    woken = []
+    monkeypatch.setattr(worker, "wake", lambda: woken.append(True))
+
+    client.get("/users/2")
+    assert woken == []
@@ -0,0 +1,57 @@
+import pytest
+
+from link_sharing_app import repository
+from link_sharing_app.db import get_db
+
+
+def test_update_statements_cover_every_field_combination():
+    assert len(repository.UPDATE_USER) == 2 ** len(repository.USER_EDITABLE_FIELDS) - 1
+    assert len(repository.UPDATE_LINK) == 2 ** len(repository.LINK_EDITABLE_FIELDS) - 1
+
+    order, sql, versioned_sql = repository.UPDATE_LINK[frozenset({"url", "platform"})]
+    assert order == ("platform", "url")
+    assert sql.startswith(
+        "UPDATE links SET platform = ?, url = ?, version = version + 1"
+    )
+    assert "AND version = ?" in versioned_sql
+
+
+def test_update_uses_canonical_field_order(app):
+    with app.app_context():
+        db = get_db()
+        link = repository.update_link(
+            db, 1, {"url": "https://github.com/new", "platform": "GitLab"}
+        )
+        assert link.platform == "GitLab"
+        assert link.url == "https://github.com/new"
+        assert link.version == 2
+
+
+def test_update_with_stale_version(app):
+    with app.app_context():
+        db = get_db()
+        assert repository.update_user(db, 1, {"first_name": "New"}, 2) is None
+        user = repository.update_user(db, 1, {"first_name": "New"}, 1)
+        assert user.first_name == "New"
+        assert user.version == 2
+
+
+def test_update_rejects_unknown_fields(app):
+    with app.app_context(), pytest.raises(KeyError):
+        repository.update_user(get_db(), 1, {"id": 5})
+
+
+def test_rows_are_slotted(app):
+    with app.app_context():
+        user = repository.get_user(get_db(), 1)
+        link = repository.get_link(get_db(), 1)
+
+    assert not hasattr(user, "__dict__")
+    assert not hasattr(link, "__dict__")
+    assert user.to_dict() == {
+        "email": "test@gmail.com",
+        "first_name": "Test",
+        "last_name": "Testowy",
+        "image_url": "https://link_to_image.com",
+    }
+    assert link.to_dict()["url"] == "https://github.com/TestTestowy"
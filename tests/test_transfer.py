@@ -0,0 +1,160 @@
+import json
+
+from link_sharing_app.db import get_db
+from link_sharing_app.purge import run_pending_purges
+
+
+def export_records(runner):
+    result = runner.invoke(args=["export"])
+    assert result.exit_code == 0
+    return [json.loads(line) for line in result.stdout.splitlines()]
+
+
+def test_export_command(runner):
+    records = export_records(runner)
+
+    assert [record["table"] for record in records] == [
+        "users",
+        "users",
+        "links",
+        "links",
+    ]
+    assert records[0]["row"]["email"] == "test@gmail.com"
+    assert records[2]["row"] == {
+        "id": 1,
+        "user_id": 1,
+        "platform": "GitHub",
+        "url": "https://github.com/TestTestowy",
+        "position": "V",
+        "created": "2025-03-14 00:00:00",
+        "version": 1,
+    }
+
+
+def test_import_command_round_trip(runner, app):
+    records = export_records(runner)
+    data = "".join(json.dumps(record) + "\n" for record in records)
+
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM links")
+        db.execute("DELETE FROM users")
+        db.commit()
+
+    result = runner.invoke(args=["import", "--batch-size", "1"], input=data)
+    assert result.exit_code == 0
+    assert "Imported 4 rows" in result.output
+    assert "rows/s" in result.output
+    assert export_records(runner) == records
+
+
+def test_import_command_restores_deferred_indexes(runner, app):
+    with app.app_context():
+        db = get_db()
+        db.execute("CREATE INDEX idx_links_platform ON links (platform)")
+        db.commit()
+
+    record = {
+        "table": "links",
+        "row": {"user_id": 2, "platform": "GitHub", "url": "https://github.com/x"},
+    }
+    result = runner.invoke(args=["import"], input=json.dumps(record) + "\n")
+    assert result.exit_code == 0
+
+    with app.app_context():
+        index = (
+            get_db()
+            .execute("SELECT name FROM sqlite_master WHERE name = 'idx_links_platform'")
+            .fetchone()
+        )
+        assert index is not None
+
+
+def test_import_command_integrity_error(runner):
+    record = {
+        "table": "users",
+        "row": {"email": "test@gmail.com", "password": "hash"},
+    }
+    result = runner.invoke(args=["import"], input=json.dumps(record) + "\n")
+    assert result.exit_code != 0
+    assert "Import failed" in result.output
+
+
+def test_import_command_unknown_table(runner):
+    record = {"table": "sqlite_master", "row": {"name": "x"}}
+    result = runner.invoke(args=["import"], input=json.dumps(record) + "\n")
+    assert result.exit_code != 0
+    assert "Unknown table: sqlite_master." in result.output
+
+
+def test_import_command_unknown_column(runner):
+    record = {"table": "users", "row": {"email": "a@b.c", "is_admin": 1}}
+    result = runner.invoke(args=["import"], input=json.dumps(record) + "\n")
+    assert result.exit_code != 0
+    assert "Unknown columns for table users." in result.output
+
+
+def test_import_command_invalid_record(runner):
+    result = runner.invoke(args=["import"], input="not json\n")
+    assert result.exit_code != 0
+    assert "Invalid record on line 1." in result.output
+
+
+def test_export_skips_deleted_users(client, runner):
+    client.delete("/users/1")
+
+    records = export_records(runner)
+    assert [(record["table"], record["row"]["id"]) for record in records] == [
+        ("users", 2),
+        ("links", 2),
+    ]
+
+
+def test_import_queues_purges_for_deleted_users(runner, app):
+    record = {
+        "table": "users",
+        "row": {
+            "email": "deleted@test.com",
+            "password": "hash",
+            "deleted_at": "2025-03-14 00:00:00",
+        },
+    }
+    result = runner.invoke(args=["import"], input=json.dumps(record) + "\n")
+    assert result.exit_code == 0
+
+    with app.app_context():
+        assert run_pending_purges() == 1
+        assert (
+            get_db()
+            .execute("SELECT * FROM users WHERE email = 'deleted@test.com'")
+            .fetchone()
+            is None
+        )
+
+
+def test_import_assigns_positions_to_legacy_links(client, runner):
+    records = [
+        {
+            "table": "links",
+            "row": {
+                "user_id": 2,
+                "platform": "GitHub",
+                "url": f"https://github.com/legacy{i}",
+                "created": f"2025-03-1{i} 00:00:00",
+            },
+        }
+        for i in (5, 7, 6)
+    ]
+    data = "".join(json.dumps(record) + "\n" for record in records)
+    result = runner.invoke(args=["import"], input=data)
+    assert result.exit_code == 0
+
+    links = client.get("/links/2").get_json()["data"]
+    assert [link["url"] for link in links] == [
+        "https://github.com/legacy7",
+        "https://github.com/legacy6",
+        "https://github.com/legacy5",
+        "https://www.linkedin.com/in/anonimowy-anonim",
+    ]
+    assert len({link["position"] for link in links}) == 4
+    assert {link["version"] for link in links} == {1}
@@ -1,9 +1,8 @@
+import pytest
 from flask import jsonify
 
 from link_sharing_app.db import get_db
 
-from .fake_db import FakeConnection
-
 
 def test_get_user_by_id(client, app):
     response = client.get("/users/1")
@@ -38,6 +37,11 @@ def test_get_user_by_id(client, app):
     return None
 
 
+def test_get_user_by_id_etag(client):
+    response = client.get("/users/1")
+    assert response.headers["ETag"] == '"1"'
+
+
 def test_get_user_by_id_convertion(client):
     response = client.get("/users/1")
     data = response.get_json()
@@ -63,7 +67,16 @@ def test_edit_user_by_id(client, app):
         return jsonify({"error": "User not found."}), 404
 
     assert response.status_code == 200
-    assert response.get_json() == {"message": "User edited successfully."}
+    assert response.get_json() == {
+        "message": "User edited successfully.",
+        "data": {
+            "email": "test@gmail.com",
+            "first_name": "Atest",
+            "last_name": "Atestowy",
+            "image_url": "https://link_to_image.com",
+        },
+    }
+    assert response.headers["ETag"] == '"2"'
 
     with app.app_context():
         assert dict(
@@ -88,14 +101,23 @@ def test_edit_user_by_id_with_invalid_data(client):
     assert response.get_json() == {"error": "Invalid field."}
 
 
-def test_edit_user_by_id_integrity_error(client, monkeypatch):
-    monkeypatch.setattr("link_sharing_app.users.get_db", lambda: FakeConnection())
+def test_edit_user_by_id_integrity_error(client):
+    response = client.patch("/users/1", json={"email": "other@wp.pl"})
+    assert response.status_code == 500
+    assert response.get_json()["error"] == "Database integrity error"
+
+
+def test_edit_user_by_id_if_match(client):
+    response = client.patch(
+        "/users/1", json={"first_name": "First"}, headers={"If-Match": '"1"'}
+    )
+    assert response.status_code == 200
 
     response = client.patch(
-        "/users/1", json={"first_name": "NewName", "last_name": "NewLastName"}
+        "/users/1", json={"first_name": "Second"}, headers={"If-Match": '"1"'}
     )
-    assert response.status_code == 500
-    assert response.get_json()["error"] == "Database integrity error"
+    assert response.status_code == 412
+    assert response.get_json() == {"error": "User has been modified."}
 
 
 def test_edit_user_by_id_not_found(client):
@@ -106,30 +128,126 @@ def test_edit_user_by_id_not_found(client):
     assert response.get_json() == {"error": "User not found."}
 
 
+@pytest.mark.parametrize("password", (5, "", None, ["secret"]))
+def test_edit_user_by_id_invalid_password(client, password):
+    response = client.patch("/users/1", json={"password": password})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid password."}
+
+
+@pytest.mark.parametrize(
+    ("id", "headers", "status"), ((9999, {}, 404), (1, {"If-Match": '"2"'}, 412))
+)
+def test_edit_user_by_id_password_not_hashed_on_failure(
+    client, monkeypatch, id, headers, status
+):
+    def fail(password):
+        raise AssertionError("The password must not be hashed.")
+
+    monkeypatch.setattr("link_sharing_app.users.hash_password", fail)
+
+    response = client.patch(f"/users/{id}", json={"password": "new"}, headers=headers)
+    assert response.status_code == status
+
+
 def test_delete_user_by_id(client, app):
     response = client.delete("/users/1")
 
     if response is None:
         return jsonify({"error": "User not found."}), 404
 
-    assert response.status_code == 200
-    assert response.get_json() == {"message": "User deleted successfully."}
+    assert response.status_code == 202
+    data = response.get_json()
+    assert data["message"] == "User deleted successfully."
+    assert data["data"]["email"] == "test@gmail.com"
 
     with app.app_context():
-        assert get_db().execute("SELECT * FROM users WHERE id = 1").fetchone() is None
+        user = get_db().execute("SELECT * FROM users WHERE id = 1").fetchone()
+        assert user["deleted_at"] is not None
     return None
 
 
+def test_delete_user_by_id_if_match(client):
+    response = client.delete("/users/1", headers={"If-Match": '"5"'})
+    assert response.status_code == 412
+    assert response.get_json() == {"error": "User has been modified."}
+
+
 def test_delete_user_not_found(client):
     response = client.delete("/users/9999")
     assert response.status_code == 404
     assert response.get_json() == {"error": "User not found."}
 
 
-def test_delete_user_by_id_integrity_error(client, monkeypatch):
-    monkeypatch.setattr("link_sharing_app.users.get_db", lambda: FakeConnection())
+def test_delete_user_by_id_integrity_error(client, fail_on):
+    fail_on("users", "UPDATE")
 
     response = client.delete("/users/1")
 
     assert response.status_code == 500
     assert response.get_json()["error"] == "Database integrity error"
+
+
+def test_get_users(client):
+    response = client.get("/users?ids=2,999,1,2")
+    assert response.status_code == 200
+
+    data = response.get_json()["data"]
+    assert [user["id"] for user in data] == [2, 1]
+    assert data[1]["email"] == "test@gmail.com"
+    assert "links" not in data[0]
+
+
+def test_get_users_include_links(client):
+    client.post(
+        "/links/",
+        json={"user_id": 1, "platform": "GitLab", "url": "https://gitlab.com/test"},
+    )
+
+    response = client.get("/users?ids=1,2&include=links")
+    assert response.status_code == 200
+
+    data = response.get_json()["data"]
+    assert [link["platform"] for link in data[0]["links"]] == ["GitLab", "GitHub"]
+    assert [link["platform"] for link in data[1]["links"]] == ["LinkedIn"]
+
+
+def test_get_users_skips_deleted(client):
+    client.delete("/users/1")
+
+    response = client.get("/users?ids=1,2")
+    assert [user["id"] for user in response.get_json()["data"]] == [2]
+
+
+def test_get_users_spans_chunks(client, app):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO users (email, password) VALUES (?, 'hash')",
+            [(f"user{i}@test.com",) for i in range(150)],
+        )
+        db.commit()
+
+    ids = ",".join(str(id) for id in range(152, 0, -1))
+    app.config["USER_BATCH_MAX_SIZE"] = 200
+
+    response = client.get(f"/users?ids={ids}&include=links")
+    data = response.get_json()["data"]
+    assert [user["id"] for user in data] == list(range(152, 0, -1))
+    assert data[-1]["links"][0]["url"] == "https://github.com/TestTestowy"
+
+
+@pytest.mark.parametrize(
+    ("query", "error"),
+    (
+        ("", "Ids are required."),
+        ("?ids=1,a", "Invalid ids."),
+        ("?ids=99999999999999999999", "Invalid ids."),
+        ("?ids=1&include=clicks", "Invalid include."),
+        (f"?ids={','.join(str(id) for id in range(101))}", "Too many ids."),
+    ),
+)
+def test_get_users_validation(client, query, error):
+    response = client.get(f"/users{query}")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": error}